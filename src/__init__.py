@@ -1,8 +1,20 @@
+import asyncio
 from fastapi import Depends, FastAPI
-from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi.responses import JSONResponse
 from src.auth.Dependencies import get_logged_user
+from src.auth.revocation import token_denylist
+from src.compression import CompressionMiddleware
 from src.config import Config
-from src.db.main import get_async_session, init_db
+from src.utils import password_hasher
+from src.db.health import pool_status, probe_engine, readiness_probe
+from src.db.instrumentation import QueryStatsMiddleware
+from src.db.main import (
+    AsyncSessionLocal,
+    async_engine,
+    read_engine,
+    replica_monitor,
+)
+from src.db.migrations import check_schema_version
 from src.users.routes import customer_router, vendor_router
 from src.vehicles.routes import vehicles_router
 from src.review.routes import review_router
@@ -18,8 +30,25 @@ from src.wallet.routes import wallet_router
 @asynccontextmanager
 async def life_span(app: FastAPI):
     print("Server starts")
-    await init_db()
+    # the schema is migrated by `python -m src.db.migrate` before the deploy,
+    # workers only check they are not running against an older one
+    await check_schema_version()
+    # keeps this worker's denylist in step with logouts on the other workers
+    denylist_sync = asyncio.create_task(token_denylist.run_sync(AsyncSessionLocal))
+    replica_checks = None
+    if replica_monitor is not None:
+        replica_checks = asyncio.create_task(replica_monitor.run_checks())
     yield
+    denylist_sync.cancel()
+    if replica_checks is not None:
+        replica_checks.cancel()
+    password_hasher.shutdown()
+    # in-flight requests are done by now, close the pooled connections
+    # instead of leaving them for the database to time out
+    await async_engine.dispose()
+    await probe_engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
     print("Server ends")
 
 
@@ -31,6 +60,8 @@ app = FastAPI(
     lifespan=life_span,
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,15 +72,41 @@ app.add_middleware(
 
 
 @app.get("/")
-async def root(session: AsyncSession = Depends(get_async_session)):
+async def root():
     return {
         "title": "WheelXchange",
         "moto": "List. Rent. Ride. Repeat!",
         "subtitle": "Where Owners Earn & Renters Roll!",
-        "DB_URI": Config.DB_URI,
     }
 
 
+# liveness, the process is up and its event loop answers, no I/O at all
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+
+# readiness, can this worker serve requests right now
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    database_ok = await readiness_probe.check()
+    pool = pool_status(async_engine)
+    saturated = pool.get("saturation", 0) >= Config.READINESS_MAX_POOL_SATURATION
+
+    body = {
+        "status": "ok" if database_ok and not saturated else "unavailable",
+        "database": "ok" if database_ok else readiness_probe.error,
+        "pool": pool,
+        # a growing queue means logins wait on bcrypt, not on the database
+        "password_hasher": password_hasher.stats(),
+    }
+    if replica_monitor is not None:
+        body["replica"] = {"usable": replica_monitor.usable, "lag": replica_monitor.lag}
+
+    status_code = 200 if body["status"] == "ok" else 503
+    return JSONResponse(body, status_code=status_code)
+
+
 @app.get("/me")
 async def me(user=Depends(get_logged_user)):
     return user
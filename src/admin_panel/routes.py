@@ -6,7 +6,8 @@ from src.auth.Dependencies import (
     get_logged_user,
 )
 import uuid
-from src.db.main import get_async_session
+from src.db.main import get_async_read_session, get_async_session
+from src.serialization import FastJSONRoute
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.booking_table.service import BookingService
 from src.config import Config
@@ -23,7 +24,7 @@ from src.admin_panel.schemas import (
 )
 from pydantic import EmailStr
 
-admin_router = APIRouter()
+admin_router = APIRouter(route_class=FastJSONRoute)
 
 booking_service = BookingService()
 admin_service = AdminService()
@@ -88,7 +89,7 @@ async def delete_booking(
     # dependencies=[admin_dependency],
 )
 async def get_all_bookings(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     API Endpoint to get all bookings for all cars.
@@ -136,7 +137,7 @@ async def delete_review(
 # ---------------------- VEHICLE ROUTES ----------------------
 @admin_router.get("/cars", response_model=List[AdminCarGetModel])
 async def get_all_cars(
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_async_read_session),
 ):
     cars = await admin_service.get_all_cars(db)
     return cars
@@ -145,9 +146,9 @@ async def get_all_cars(
 @admin_router.get("/cars/{car_uid}", response_model=AdminCarGetModel)
 async def get_car(
     car_uid: uuid.UUID,
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_async_read_session),
 ):
-    car = await car_service.get_car(car_uid, db)
+    car = await car_service.get_car_detail(car_uid, db)
     if not car:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -177,7 +178,7 @@ async def delete_car(car_uid: uuid.UUID, db: AsyncSession = Depends(get_async_se
     "/customers",
     response_model=List[CustomerGetModel],
 )
-async def get_all_customers(session: AsyncSession = Depends(get_async_session)):
+async def get_all_customers(session: AsyncSession = Depends(get_async_read_session)):
 
     customers = await admin_service.get_all_customers(session)
     return customers
@@ -188,7 +189,7 @@ async def get_all_customers(session: AsyncSession = Depends(get_async_session)):
     response_model=CustomerGetModel,
 )
 async def get_customer_by_email(
-    email: EmailStr, session: AsyncSession = Depends(get_async_session)
+    email: EmailStr, session: AsyncSession = Depends(get_async_read_session)
 ):
 
     customer = await customer_service.get_customer_by_email(email, session)
@@ -219,7 +220,7 @@ async def delete_customers(
     "/vendors",
     response_model=List[VendorGetModel],
 )
-async def get_all_vendors(session: AsyncSession = Depends(get_async_session)):
+async def get_all_vendors(session: AsyncSession = Depends(get_async_read_session)):
     vendors = await admin_service.get_all_vendors(session)
     return vendors
 
@@ -229,7 +230,7 @@ async def get_all_vendors(session: AsyncSession = Depends(get_async_session)):
     response_model=VendorGetModel,
 )
 async def get_vendor_by_email(
-    email: EmailStr, session: AsyncSession = Depends(get_async_session)
+    email: EmailStr, session: AsyncSession = Depends(get_async_read_session)
 ):
 
     vendor = await vendor_service.get_vendor_by_email(email, session)
@@ -1,4 +1,5 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
+from src.auth.Dependencies import forget_user
 from src.config import Config
 import uuid
 from src.db.models import Reviews, Cars
@@ -37,10 +38,12 @@ class AdminService(CustomerService, VendorService, CarService):
         statement = select(Reviews).where(
             Reviews.uid == review_uid,
         )
-        result = await session.exec(statement).first()
-        if not result:
+        result = await session.exec(statement)
+        review = result.first()
+        if not review:
             return
-        await session.delete(result)
+        await self.update_rating(review.car_id, -1, -review.rating, session)
+        await session.delete(review)
         await session.commit()
         return {"message": "review deleted successfully"}
 
@@ -67,8 +70,10 @@ class AdminService(CustomerService, VendorService, CarService):
                 return
             await session.delete(customer)
             await session.commit()
+            forget_user("Customer", customer.email)
             return 200
 
         await session.delete(vendor)
         await session.commit()
+        forget_user("Vendor", vendor.email)
         return 200
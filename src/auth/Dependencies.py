@@ -1,10 +1,13 @@
 from typing import List
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import func
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.models import BaseUser, Customers, Vendors
 from src.db.main import get_async_session
 from src.auth.oauth2 import AuthService
+from src.cache import TTLCache
+from src.config import Config
 from fastapi.security import OAuth2PasswordBearer
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/vendors/login")
@@ -15,18 +18,29 @@ credentials_exception = HTTPException(
     headers={"WWW-Authenticate": "Bearer"},
 )
 
+# logged in users by (role, email) so authenticated requests skip the SELECT.
+# entries are shared between requests, read them but never add them to a session.
+# deleting an account must call forget_user
+user_cache = TTLCache(Config.USER_CACHE_SIZE, Config.USER_CACHE_TTL_SECONDS)
 
-def get_token_data(token=Depends(oauth_scheme)):
+
+def forget_user(role: str, email: str) -> None:
+    user_cache.delete((role, email.lower()))
+
+
+# every dependency below asks for the token through this one and FastAPI
+# caches dependencies per request, so the jwt is decoded once per request.
+# async so FastAPI does not hop to its threadpool just to decode a token
+async def get_token_data(token=Depends(oauth_scheme)):
     token_data = auth_service.verify_access_token(token, credentials_exception)
     return token_data
 
 
 async def get_logged_user(
     session: AsyncSession = Depends(get_async_session),
-    token=Depends(oauth_scheme),
+    token_data: dict = Depends(get_token_data),
 ) -> BaseUser:
 
-    token_data = auth_service.verify_access_token(token, credentials_exception)
     email = token_data.get("email")
     role = token_data.get("role")
 
@@ -36,9 +50,14 @@ async def get_logged_user(
             detail="Could not validate credentials",
         )
 
-    statement = select(Customers).where(Customers.email == email)
+    email = email.lower()
+    user = user_cache.get((role, email))
+    if user is not None:
+        return user
+
+    statement = select(Customers).where(func.lower(Customers.email) == email)
     if role == "Vendor":
-        statement = select(Vendors).where(Vendors.email == email)
+        statement = select(Vendors).where(func.lower(Vendors.email) == email)
     else:
         pass
     response = await session.exec(statement)
@@ -50,13 +69,18 @@ async def get_logged_user(
             detail={"message": "User not found"},
         )
 
+    # detached, so a rollback in this request can not expire the cached copy
+    # other requests are going to use
+    session.expunge(user)
+    user_cache.set((role, email), user)
     return user
 
 
 # why use a higher order  because dependency takes only reference of
 def role_checker(allowed_role: List[str]):
-    def _role_dependency(token=Depends(oauth_scheme), _=Depends(get_logged_user)):
-        token_data = auth_service.verify_access_token(token, credentials_exception)
+    async def _role_dependency(
+        token_data: dict = Depends(get_token_data), _=Depends(get_logged_user)
+    ):
         role = token_data.get("role")
         if not role:
             raise HTTPException(
@@ -2,6 +2,7 @@ from typing import Optional
 import uuid
 import jwt
 from datetime import timedelta, datetime, timezone
+from src.auth.revocation import token_denylist
 from src.config import Config
 
 
@@ -33,6 +34,10 @@ class AuthService:
             if payload.get("email") is None:
                 raise credentials_exception
 
+            # logged out, an in memory lookup and not a query
+            if token_denylist.is_revoked(payload.get("jti")):
+                raise credentials_exception
+
             return payload
 
         except jwt.InvalidTokenError:
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.models import RevokedToken
+
+
+class TokenDenylist:
+    """
+    Revoked token ids (jti) with their expiry, kept in memory so checking a
+    token never touches the database. The RevokedToken table is the shared
+    copy: every worker writes its logouts there and pulls the others' with sync().
+    """
+
+    def __init__(self, sync_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._synced_at: Optional[datetime] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        # an expired token is rejected by jwt.decode before we get here
+        return jti is not None and jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: datetime, session: AsyncSession):
+        session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        await session.commit()
+        self._revoked[jti] = expires_at
+
+    async def sync(self, session: AsyncSession) -> None:
+        """
+        Pulls tokens revoked since the last sync (by any worker) and forgets
+        the ones that expired, here and in the table.
+        """
+        now = datetime.utcnow()
+        statement = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > now
+        )
+        if self._synced_at is not None:
+            # overlap the previous window a little, worker clocks drift
+            since = self._synced_at - timedelta(seconds=self.sync_interval + 30)
+            statement = statement.where(RevokedToken.revoked_at >= since)
+
+        result = await session.exec(statement)
+        for jti, expires_at in result.all():
+            self._revoked[jti] = expires_at
+
+        self._revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+
+        await session.exec(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await session.commit()
+        self._synced_at = now
+
+    async def run_sync(self, session_factory) -> None:
+        # background task started in the app lifespan
+        while True:
+            try:
+                async with session_factory() as session:
+                    await self.sync(session)
+            except Exception as e:
+                print(f"Token denylist sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+token_denylist = TokenDenylist(Config.TOKEN_DENYLIST_SYNC_SECONDS)
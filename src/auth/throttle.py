@@ -0,0 +1,172 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from src.config import Config
+
+
+class ThrottleBackend(ABC):
+    """
+    Where failed login counters live. Every key holds a sliding window counter
+    (failures in the current and the previous window) and the time of the last failure.
+    The in memory backend is per worker, a shared store (redis, memcached...) only
+    has to implement these three methods for all workers to see the same counters.
+    """
+
+    @abstractmethod
+    async def reserve(
+        self, key: str, now: float, window: float
+    ) -> Tuple[float, float]:
+        """
+        Counts one more failure and returns what was there before it,
+        (failures in the last `window` seconds, time of the last failure).
+        Must be a single atomic step (INCR on redis), two concurrent attempts
+        never see the same count.
+        """
+        pass
+
+    @abstractmethod
+    async def release(
+        self, key: str, now: float, window: float, last_failure: Optional[float] = None
+    ) -> None:
+        """
+        Takes back one reserved failure. With last_failure the time of the last
+        failure goes back to it, unless another failure was reserved since.
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self, key: str) -> None:
+        pass
+
+
+class MemoryThrottleBackend(ThrottleBackend):
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        # key -> [window index, current count, previous count, last failure]
+        self._counters: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def _roll(self, key: str, now: float, window: float) -> List[float]:
+        index = now // window
+        counter = self._counters.get(key)
+        if counter is None:
+            return [index, 0, 0, 0.0]
+
+        if counter[0] == index - 1:
+            counter[:3] = [index, 0, counter[1]]
+        elif counter[0] != index:
+            counter[:3] = [index, 0, 0]
+        return counter
+
+    # no await in here, so the read and the increment happen in one step
+    async def reserve(self, key, now, window):
+        counter = self._roll(key, now, window)
+        index, current, previous, last_failure = counter
+        # the previous window counts for the part of it still inside the last `window` seconds
+        elapsed = (now - index * window) / window
+        failures = current + previous * (1 - elapsed)
+
+        counter[1] += 1
+        counter[3] = now
+
+        # a spray of ips or emails can not grow this past maxsize,
+        # the keys that failed least recently go first
+        self._counters[key] = counter
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.maxsize:
+            self._counters.popitem(last=False)
+
+        return failures, last_failure
+
+    async def release(self, key, now, window, last_failure=None):
+        if key not in self._counters:
+            return
+
+        # reserved in the previous window if it rolled over since
+        counter = self._roll(key, now, window)
+        if counter[1] > 0:
+            counter[1] -= 1
+        elif counter[2] > 0:
+            counter[2] -= 1
+        if last_failure is not None and counter[3] == now:
+            counter[3] = last_failure
+
+    async def clear(self, key):
+        self._counters.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class LoginThrottle:
+    """
+    Counts failed logins per account and per client ip. Past the free attempts
+    every new failure doubles the wait before the next attempt (up to max_delay).
+    Every attempt is counted as a failure before the user lookup and bcrypt and
+    taken back when the password was right, so concurrent guesses can not all
+    get through on the same count. A rejected attempt is a couple of dict lookups.
+    """
+
+    def __init__(
+        self,
+        backend: ThrottleBackend,
+        window: float,
+        account_attempts: int,
+        ip_attempts: int,
+        base_delay: float,
+        max_delay: float,
+    ) -> None:
+        self.backend = backend
+        self.window = window
+        self.account_attempts = account_attempts
+        self.ip_attempts = ip_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _keys(self, role: str, email: str, client_ip: str):
+        return [
+            (f"account:{role}:{email.lower()}", self.account_attempts),
+            (f"ip:{client_ip}", self.ip_attempts),
+        ]
+
+    async def attempt(self, role: str, email: str, client_ip: str) -> float:
+        """
+        Reserves a failed attempt for this account and ip and returns 0, or
+        returns the seconds until they may try again and reserves nothing.
+        """
+        now = time.time()
+        reserved = []
+        wait = 0.0
+        for key, free_attempts in self._keys(role, email, client_ip):
+            failures, last_failure = await self.backend.reserve(key, now, self.window)
+            reserved.append((key, last_failure))
+            excess = int(failures) - free_attempts
+            if excess < 0:
+                continue
+
+            delay = min(self.max_delay, self.base_delay * 2 ** min(excess, 32))
+            wait = max(wait, last_failure + delay - now)
+
+        # throttled attempts are not failures, only the ones that reach bcrypt,
+        # hammering a locked account must not push its lock further
+        if wait > 0:
+            for key, last_failure in reserved:
+                await self.backend.release(key, now, self.window, last_failure)
+        return wait
+
+    async def succeeded(self, role: str, email: str, client_ip: str) -> None:
+        # only the account is forgiven, one valid password must not
+        # reset the counter of an ip stuffing credentials
+        await self.backend.clear(f"account:{role}:{email.lower()}")
+        await self.backend.release(f"ip:{client_ip}", time.time(), self.window)
+
+
+login_throttle = LoginThrottle(
+    MemoryThrottleBackend(Config.LOGIN_THROTTLE_MAX_KEYS),
+    window=Config.LOGIN_THROTTLE_WINDOW_SECONDS,
+    account_attempts=Config.LOGIN_THROTTLE_ACCOUNT_ATTEMPTS,
+    ip_attempts=Config.LOGIN_THROTTLE_IP_ATTEMPTS,
+    base_delay=Config.LOGIN_THROTTLE_BASE_DELAY_SECONDS,
+    max_delay=Config.LOGIN_THROTTLE_MAX_DELAY_SECONDS,
+)
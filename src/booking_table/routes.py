@@ -6,12 +6,13 @@ from src.auth.Dependencies import (
     get_logged_user,
 )
 import uuid
-from src.db.main import get_async_session
+from src.db.main import get_async_read_session, get_async_session
+from src.serialization import FastJSONRoute
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.models import BaseUser
 from src.booking_table.service import BookingService
 
-booking_router = APIRouter()
+booking_router = APIRouter(route_class=FastJSONRoute)
 booking_service = BookingService()
 
 
@@ -31,7 +32,8 @@ async def create_booking(
 ):
     """
     API Endpoint to allow a customer to book a car.
-    A customer can only book a car once if it is not already booked.
+    A customer can book a car for a period in which neither the car nor the
+    customer has another booking.
     """
 
     booking = await booking_service.create_booking(
@@ -85,7 +87,7 @@ async def delete_booking(
     dependencies=[vendor_dependency],
 )
 async def get_vendor_bookings(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
     current_user: BaseUser = Depends(
         get_logged_user
     ),  # Automatically get logged-in user
@@ -108,7 +110,7 @@ async def get_vendor_bookings(
     status_code=status.HTTP_200_OK,
 )
 async def get_customer_booking(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
     current_user: BaseUser = Depends(
         get_logged_user
     ),  # Automatically get logged-in user
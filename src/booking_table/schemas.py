@@ -1,5 +1,6 @@
 # from enum import Enum
-from datetime import datetime
+import math
+from datetime import datetime, timedelta
 from pydantic import validator, BaseModel
 import uuid
 
@@ -18,6 +19,17 @@ class CreateBookingModel(BaseModel):
             raise ValueError("End date must be after start date.")
         return end_date
 
+    # the price is per day of the booked period, a started day counts as a day
+    @validator("no_of_days")
+    def validate_no_of_days(cls, no_of_days, values):
+        start_date = values.get("start_date")
+        end_date = values.get("end_date")
+        if start_date and end_date:
+            days = math.ceil((end_date - start_date) / timedelta(days=1))
+            if no_of_days != days:
+                raise ValueError(f"The period from start to end date is {days} days.")
+        return no_of_days
+
 
 # for the logic of start date and end date we can do method overloading also
 # or this built-in method also can be used
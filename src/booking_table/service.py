@@ -1,13 +1,11 @@
-from typing import Optional
-
-from fastapi import Depends, HTTPException
-from src.db.main import get_async_session
-from src.db.models import Cars, Booking, Wallet
+from fastapi import HTTPException
+from src.db.models import Booking, Cars
 from src.db.models import BaseUser
 from sqlmodel import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from src.booking_table.schemas import CreateBookingModel
-from src.vehicles.service import CarService
+from src.vehicles.service import CarService, catalog_cache, overlapping_bookings
 from src.wallet.service import WalletService
 import uuid
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -31,38 +29,6 @@ class BookingService:
 
         return booking
 
-    # Check if the car is available
-    async def is_car_available(self, car_uid: uuid.UUID, session: AsyncSession):
-        # Check if car exists
-        car = await self.car_service.get_car(car_uid, session)
-
-        if not car:
-            print("Car not found")
-            return False
-
-        if car.is_booked:
-            print("Car is already booked")
-            return False
-
-        return True
-
-    # get previous if any
-
-    async def customer_active_booking(
-        self,
-        customer_uid: uuid.UUID,
-        session: AsyncSession = Depends(get_async_session),
-    ):
-        statement = (
-            select(Booking)
-            .where(Booking.customer_id == customer_uid)
-            .where(Booking.is_active == True)
-        )
-        result = await session.exec(statement)
-        booking = result.first()
-
-        return booking
-
     # Create a booking
     async def create_booking(
         self,
@@ -71,60 +37,96 @@ class BookingService:
         session: AsyncSession,
         current_user: BaseUser,
     ):
-
-        # Check if car is available
-        is_available = await self.is_car_available(car_uid, session)
-        is_previous_booking_active = await self.customer_active_booking(
-            current_user.uid, session
+        """
+        Books the car and moves the money in one transaction.
+        The car row lock serializes bookings of the same car and the customer
+        wallet lock serializes bookings of the same customer, so the checks
+        below always see every booking committed before ours.
+        """
+
+        # lock the car, only the two columns we need
+        statement = (
+            select(Cars.vendor_id, Cars.price_per_day)
+            .where(Cars.uid == car_uid)
+            .with_for_update()
         )
-
-        if is_previous_booking_active:
-            return None
-
-        if not is_available:
-            print("Car is not available")
-            return None
-
-        car = await self.car_service.get_car(car_uid, session)
+        result = await session.exec(statement)
+        car = result.first()
         if not car:
-            return
+            print("Car not found")
+            return None
 
-        car.is_booked = True
-        price = car.price_per_day * booking.no_of_days
+        vendor_id, price_per_day = car
+        price = price_per_day * booking.no_of_days
 
-        # Fetch wallet
-        customer_wallet: Optional[Wallet] = (
-            await self.wallet_service.get_customer_wallet(current_user.uid, session)
+        # lock the customer's wallet before checking anything else, a second
+        # booking of the same customer waits here and then sees ours
+        wallet = await self.wallet_service.lock_customer_wallet(
+            current_user.uid, session
         )
-        vendor_wallet: Optional[Wallet] = await self.wallet_service.get_vendor_wallet(
-            car.vendor_id, session
+        if wallet is None:
+            await session.rollback()
+            print("Wallet not found")
+            return None
+        wallet_uid, balance = wallet
+
+        # both checks in one round trip
+        statement = select(
+            overlapping_bookings(car_uid, booking.start_date, booking.end_date)
+            .exists()
+            .label("is_overlapping"),
+            # a customer drives one car at a time, bookings of other
+            # periods (past or future) do not matter
+            select(Booking.uid)
+            .where(Booking.customer_id == current_user.uid)
+            .where(Booking.is_active == True)
+            .where(Booking.start_date < booking.end_date)
+            .where(Booking.end_date > booking.start_date)
+            .exists()
+            .label("customer_is_busy"),
         )
+        result = await session.exec(statement)
+        is_overlapping, customer_is_busy = result.one()
 
-        if customer_wallet is None:
-            return
-
-        if vendor_wallet is None:
-            return
-
-        # Deduct from wallet
-        try:
-            customer_wallet -= price
-            session.add(customer_wallet)
-        except ValueError:
+        if is_overlapping or customer_is_busy:
+            await session.rollback()
+            print("Car or customer is already booked for this period")
             return None
 
-        vendor_wallet += price
-        session.add(vendor_wallet)
+        if balance < price:
+            await session.rollback()
+            print("Insufficient balance")
+            return None
 
         booking_data = booking.model_dump()
         booking_data["car_id"] = car_uid
         booking_data["customer_id"] = current_user.uid
-        booking_data["vendor_id"] = car.vendor_id
+        booking_data["vendor_id"] = vendor_id
         booking_data["total_price"] = price
         new_booking = Booking(**booking_data)
         session.add(new_booking)
+        try:
+            await session.flush()  # the ledger entries reference the booking
+        except IntegrityError:
+            # postgres exclusion constraint, last line of defence against
+            # an overlapping booking
+            await session.rollback()
+            return None
+
+        # the money moves as two ledger entries in this same transaction
+        await self.wallet_service.debit_wallet(
+            wallet_uid, price, session, new_booking.uid
+        )
+        if not await self.wallet_service.credit_vendor(
+            vendor_id, price, session, new_booking.uid
+        ):
+            await session.rollback()
+            return None
+
         await session.commit()
+        catalog_cache.clear()  # availability of the car changed
         await session.refresh(new_booking)
+        await session.refresh(new_booking, ["car"])
 
         return new_booking
 
@@ -135,27 +137,20 @@ class BookingService:
             print("Booking not found")
             return None
 
-        # set the car back to available
-        result = await session.exec(select(Cars).where(Cars.uid == booking.car_id))
-        car = result.first()
-        if car:
-            car.is_booked = False
-            await session.commit()
-
-        # in this logic it might be difficult to use get_car  because
-        # delete_booking takes only one argument so we have two options
-        # either we take car_uid here or we have to take that as a url in end point
-        # so it is better to define logic explicitly imo
-
-        # Delete the booking
+        # Delete the booking, an inactive booking no longer blocks the car
         booking.is_active = False
         await session.commit()
+        catalog_cache.clear()  # the period is free again
         print("Booking successfully deleted")
         return {"message": "Booking successfully deleted"}
 
     # Get all bookings
     async def get_vendor_bookings(self, vendor_uid: uuid.UUID, session: AsyncSession):
-        statement = select(Booking).where(Booking.vendor_id == vendor_uid)
+        statement = (
+            select(Booking)
+            .where(Booking.vendor_id == vendor_uid)
+            .options(selectinload(Booking.car))
+        )
         result = await session.exec(statement)
         bookings = result.all()
 
@@ -169,7 +164,11 @@ class BookingService:
     async def get_customer_booking(
         self, customer_uid: uuid.UUID, session: AsyncSession
     ):
-        statement = select(Booking).where(Booking.customer_id == customer_uid)
+        statement = (
+            select(Booking)
+            .where(Booking.customer_id == customer_uid)
+            .options(selectinload(Booking.car))
+        )
         result = await session.exec(statement)
         booking = result.all()
 
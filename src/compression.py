@@ -0,0 +1,176 @@
+import zlib
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import Config
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+
+# json and text shrink a lot, images and archives are compressed already
+_COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "application/msgpack",  # binary, but the repeated keys still shrink a lot
+    "application/x-msgpack",
+}
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type in _COMPRESSIBLE_TYPES
+        or media_type.startswith("text/")
+        or media_type.endswith("+json")
+    )
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Picks "br" or "gzip" from an Accept-Encoding header, the highest q value
+    wins and br wins a tie. None when the client takes neither.
+    """
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding == "*":
+            for name in available:
+                weights.setdefault(name, q)
+        elif coding in available:
+            weights[coding] = q
+
+    best = None
+    for name in available:
+        if weights.get(name, 0) > 0 and (best is None or weights[name] > weights[best]):
+            best = name
+    return best
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        # wbits 31: gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(Config.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        if last:
+            return compressed + self._compressor.finish()
+        return compressed + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli / gzip for json and text responses of at least
+    COMPRESSION_MINIMUM_SIZE bytes, smaller ones are not worth the cpu.
+    Bodies from COMPRESSION_OFFLOAD_SIZE up are compressed in a worker thread
+    (zlib and brotli release the GIL) so one big admin listing does not hold up
+    the event loop. Streaming responses are compressed chunk by chunk and flushed
+    after each one, the client gets every chunk as soon as it is produced.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, encoding))
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, encoding: str) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None  # held back until the first body
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+
+            # the whole body in one message, we know its size up front
+            if not more_body and len(body) < Config.COMPRESSION_MINIMUM_SIZE:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _Brotli() if self.encoding == "br" else _Gzip()
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                body = await self._compress(body, last=True)
+                headers["Content-Length"] = str(len(body))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # streaming, the compressed length is not known until the end
+            del headers["Content-Length"]
+            await self.send(start)
+
+        body = await self._compress(body, last=not more_body)
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    async def _compress(self, data: bytes, last: bool) -> bytes:
+        if len(data) >= Config.COMPRESSION_OFFLOAD_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, data, last)
+        return self.compressor.compress(data, last)
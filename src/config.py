@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -5,9 +7,48 @@ class Settings(BaseSettings):
     ADMIN_NAME: str
     ADMIN_PANEL_PASSWORD: str
     DB_URI: str
+    DB_READ_URI: Optional[str] = None  # read replica, reads use DB_URI if unset
+    # per engine and per worker, the database sees workers * (size + overflow)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: float = 2.0
+    DEBUG: bool = False  # adds query count / db time headers to responses
+    SQL_ECHO: bool = False  # logs every statement, local debugging only
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 0.1
+    REQUEST_QUERY_WARN_THRESHOLD: int = 20
+    REPEATED_QUERY_WARN_THRESHOLD: int = 5
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_DAYS: int
+    CATALOG_CACHE_SIZE: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: float = 5.0
+    USER_CACHE_SIZE: int = 4096
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    PASSWORD_HASH_WORKERS: int = 4
+    TOKEN_DENYLIST_SYNC_SECONDS: float = 5.0
+    LOGIN_THROTTLE_WINDOW_SECONDS: float = 900.0
+    LOGIN_THROTTLE_ACCOUNT_ATTEMPTS: int = 5
+    LOGIN_THROTTLE_IP_ATTEMPTS: int = 20
+    LOGIN_THROTTLE_BASE_DELAY_SECONDS: float = 1.0
+    LOGIN_THROTTLE_MAX_DELAY_SECONDS: float = 900.0
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes, smaller responses go as they are
+    COMPRESSION_OFFLOAD_SIZE: int = 65536  # bytes, compressed in a thread from here
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # 0-11, above 5 is too slow for dynamic responses
+    WEB_CONCURRENCY: Optional[int] = None  # src.serve workers, None: one per core
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # per worker, 503 above it
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 75  # longer than the load balancer's idle timeout
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    # proxies whose X-Forwarded-For / -Proto are believed, comma separated or "*".
+    # the login throttle keys on the client ip, it is the proxy's ip otherwise
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    READINESS_CHECK_SECONDS: float = 5.0  # /readyz reuses a database check this long
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+    READINESS_MAX_POOL_SATURATION: float = 1.0  # not ready once the pool is this full
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.config import Config
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """
+    How busy the engine's pool is, read from the pool's counters (no I/O).
+    Empty for pools without counters (NullPool, StaticPool).
+    """
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+
+    capacity = Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+    in_use = pool.checkedout()
+    return {
+        "in_use": in_use,
+        "idle": pool.checkedin(),
+        "capacity": capacity,
+        "saturation": round(in_use / capacity, 2),
+    }
+
+
+class ReadinessProbe:
+    """
+    Database check for /readyz, a SELECT 1 on its own single connection so probes
+    never wait for (or take) a connection the requests need.
+    The result is reused for `interval` seconds and concurrent probes share one
+    check, however often the load balancers ask the database sees one query per
+    interval per worker.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float, timeout: float) -> None:
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.ok = False
+        self.error: Optional[str] = "not checked yet"
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < self.interval
+
+    async def _select_one(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self) -> bool:
+        if self._fresh():
+            return self.ok
+
+        async with self._lock:
+            # another probe may have checked while this one waited
+            if self._fresh():
+                return self.ok
+            try:
+                await asyncio.wait_for(self._select_one(), self.timeout)
+                self.ok, self.error = True, None
+            except asyncio.TimeoutError:
+                self.ok, self.error = False, f"no answer in {self.timeout}s"
+            except Exception as e:
+                self.ok, self.error = False, type(e).__name__
+            self._checked_at = time.monotonic()
+        return self.ok
+
+
+# one connection, outside of the request pool
+probe_engine = create_async_engine(Config.DB_URI, pool_size=1, max_overflow=0)
+readiness_probe = ReadinessProbe(
+    probe_engine, Config.READINESS_CHECK_SECONDS, Config.READINESS_TIMEOUT_SECONDS
+)
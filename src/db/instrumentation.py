@@ -0,0 +1,124 @@
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import Config
+
+
+class QueryStats:
+    """
+    What one request asked the database: how many statements and how long they took.
+    Identical statements are counted together, the same SELECT running
+    for every row of a result (an N+1) shows up as one statement with a big count.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int):
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+# set by QueryStatsMiddleware for the duration of a request,
+# None for queries outside of requests (background tasks, scripts)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _short(statement: str, length: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Times every statement of the engine (pass async_engine.sync_engine for async ones).
+    Only a perf_counter and a Counter update per query, cheap enough to stay on
+    in production, unlike echo=True.
+    """
+
+    # the start time lives on the execution context and goes away with it,
+    # a statement that fails never reaches _stop and leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started_at
+
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if (
+            elapsed * 1000 >= Config.SLOW_QUERY_MS
+            and random.random() < Config.SLOW_QUERY_SAMPLE_RATE
+        ):
+            print(f"Slow query ({elapsed * 1000:.1f} ms): {_short(statement)}")
+
+
+class QueryStatsMiddleware:
+    """
+    Collects QueryStats for every http request, warns about requests running too
+    many queries or the same query over and over, and in DEBUG adds the figures
+    to the response (X-DB-Query-Count and Server-Timing headers).
+    Plain ASGI so it does not wrap the response the way BaseHTTPMiddleware does.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            # the handler is done with the database by the time it starts answering
+            if message["type"] == "http.response.start" and Config.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers.append("Server-Timing", f"db;dur={stats.total_time * 1000:.1f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = scope.get("route")
+        endpoint = f"{scope['method']} {route.path if route else scope['path']}"
+
+        if stats.count >= Config.REQUEST_QUERY_WARN_THRESHOLD:
+            print(
+                f"{endpoint} ran {stats.count} queries "
+                f"in {stats.total_time * 1000:.1f} ms"
+            )
+
+        for statement, count in stats.repeated(Config.REPEATED_QUERY_WARN_THRESHOLD):
+            print(f"Possible N+1 in {endpoint}, {count}x: {_short(statement)}")
@@ -1,25 +1,22 @@
+import asyncio
 from src.config import Config
-from typing import AsyncGenerator
+from src.db.instrumentation import instrument_engine
+from typing import AsyncGenerator, Optional
 
-from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 
 
 async_engine = create_async_engine(
     Config.DB_URI,
-    echo=True,
-    pool_size=10,
-    max_overflow=20,
+    echo=Config.SQL_ECHO,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
     pool_pre_ping=True,  # this line!  Important for Neon
 )
-
-
-async def init_db():
-    async with async_engine.begin() as conn:
-        # from src.db.models import Cars
-
-        await conn.run_sync(SQLModel.metadata.create_all)
+instrument_engine(async_engine.sync_engine)
 
 
 # this was causing slow response therefore
@@ -38,6 +35,111 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+# ---------------------- READ REPLICA ----------------------
+
+# 0 on a primary or a replica that replayed everything it received,
+# otherwise how old the last replayed transaction is
+_PG_REPLICA_LAG = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class ReplicaMonitor:
+    """
+    Polls the read replica and decides whether read sessions may use it.
+    The replica is unusable until the first successful check, when it is down
+    and when it lags more than max_lag seconds behind the primary.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, interval: float) -> None:
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.usable = False
+        self.lag: Optional[float] = None
+
+    def _set_usable(self, usable: bool, reason: str) -> None:
+        if usable != self.usable:
+            print(f"Read replica {'in use' if usable else 'unusable'}: {reason}")
+        self.usable = usable
+
+    def mark_down(self, reason: str) -> None:
+        self.lag = None
+        self._set_usable(False, reason)
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = (await conn.execute(text(_PG_REPLICA_LAG))).scalar()
+                else:
+                    # nothing to measure, a reachable replica counts as in sync
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0
+        except Exception as e:
+            self.mark_down(f"check failed ({e})")
+            return
+
+        self.lag = float(lag or 0)
+        if self.lag > self.max_lag:
+            self._set_usable(False, f"{self.lag:.1f}s behind the primary")
+        else:
+            self._set_usable(True, f"{self.lag:.1f}s behind the primary")
+
+    async def run_checks(self) -> None:
+        # background task started in the app lifespan
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+
+read_engine: Optional[AsyncEngine] = None
+replica_monitor: Optional[ReplicaMonitor] = None
+AsyncReadSessionLocal = AsyncSessionLocal
+
+if Config.DB_READ_URI:
+    read_engine = create_async_engine(
+        Config.DB_READ_URI,
+        echo=Config.SQL_ECHO,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+    instrument_engine(read_engine.sync_engine)
+    replica_monitor = ReplicaMonitor(
+        read_engine, Config.DB_REPLICA_MAX_LAG_SECONDS, Config.DB_REPLICA_CHECK_SECONDS
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for routes that only read. Uses the replica when there is a usable
+    one, the primary otherwise. Reads may be up to DB_REPLICA_MAX_LAG_SECONDS old,
+    so never use it to read something and then write based on it.
+    """
+
+    if replica_monitor is None or not replica_monitor.usable:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError) as e:
+            # this request fails, the next ones go to the primary
+            # until a check finds the replica healthy again
+            replica_monitor.mark_down(f"query failed ({e.orig})")
+            raise
+
+
 # Notes:=> for the parameters used in async engine
 
 # pool_size: This determines the initial number of database connections
@@ -0,0 +1,40 @@
+"""
+Brings the database schema up to date.
+
+    python -m src.db.migrate             apply the pending migrations
+    python -m src.db.migrate --current   print the schema version and exit
+
+An empty database gets the whole schema from the models in one go and is stamped
+with the latest revision. A database created by create_all before migrations
+existed has no schema_version table yet and starts from revision 0.
+Run it once per deploy (the Procfile release phase), never from the workers.
+"""
+
+import argparse
+import asyncio
+
+from src.db.main import async_engine
+from src.db.migrations import HEAD, current_version, upgrade
+
+
+async def main(current: bool):
+    try:
+        if current:
+            async with async_engine.connect() as conn:
+                version = await conn.run_sync(current_version)
+            print(f"Schema version: {version}, latest: {HEAD}")
+        else:
+            version = await upgrade()
+            print(f"Schema is at revision {version}")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--current", action="store_true", help="print the schema version and exit"
+    )
+    asyncio.run(main(parser.parse_args().current))
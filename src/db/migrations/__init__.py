@@ -0,0 +1,124 @@
+"""
+Versioned schema migrations, applied in order by `python -m src.db.migrate`.
+
+Every module has a `revision` (one more than the previous one), a `description`
+and an `upgrade(conn)` taking a synchronous Connection. Migrations are frozen:
+they spell out their own SQL / tables instead of importing the models, so that
+replaying them later still produces the schema they were written for.
+Revision 0 is the schema create_all produced before migrations existed.
+"""
+
+from typing import Optional
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Integer,
+    MetaData,
+    Table,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+import src.vehicles.search  # noqa: F401  registers the search DDL on the cars table
+from src.db.main import async_engine
+
+from . import (
+    v0001_catalog_indexes,
+    v0002_rating_aggregates,
+    v0003_booking_periods,
+    v0004_wallet_ledger,
+    v0005_revoked_tokens,
+    v0006_identity_indexes,
+    v0007_rating_order_index,
+)
+
+MIGRATIONS = [
+    v0001_catalog_indexes,
+    v0002_rating_aggregates,
+    v0003_booking_periods,
+    v0004_wallet_ledger,
+    v0005_revoked_tokens,
+    v0006_identity_indexes,
+    v0007_rating_order_index,
+]
+
+HEAD = MIGRATIONS[-1].revision
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False),
+)
+
+# any constant works, it only has to be the same for every process migrating
+_MIGRATION_LOCK_ID = 7_346_201
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    if not inspect(conn).has_table("schema_version"):
+        return None
+    return conn.execute(select(schema_version.c.version)).scalar_one()
+
+
+def _upgrade(conn: Connection) -> int:
+    if conn.dialect.name == "postgresql":
+        # two deploys migrating at once wait for each other,
+        # released with the transaction
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MIGRATION_LOCK_ID}
+        )
+
+    version = current_version(conn)
+    if version is None:
+        schema_version.create(conn)
+        if inspect(conn).has_table("cars"):
+            version = 0
+        else:
+            SQLModel.metadata.create_all(conn)
+            version = HEAD
+            print(f"Created the schema at revision {HEAD}")
+        conn.execute(schema_version.insert().values(version=version))
+
+    for migration in MIGRATIONS:
+        if migration.revision <= version:
+            continue
+
+        print(f"Applying migration {migration.revision}: {migration.description}")
+        migration.upgrade(conn)
+        version = migration.revision
+        conn.execute(update(schema_version).values(version=version))
+
+    return version
+
+
+async def upgrade(engine: AsyncEngine = async_engine) -> int:
+    async with engine.begin() as conn:
+        return await conn.run_sync(_upgrade)
+
+
+async def check_schema_version(engine: AsyncEngine = async_engine) -> None:
+    """
+    Startup check, one single row read instead of create_all.
+    Refuses to serve on a schema older than the code; a newer one is fine
+    (migrations stay backwards compatible for the length of a rolling deploy).
+    """
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(schema_version.c.version))
+            version = result.scalar_one()
+    except DBAPIError:
+        version = None
+
+    if version is None or version < HEAD:
+        raise RuntimeError(
+            f"Database schema is at revision {version}, this code needs {HEAD}. "
+            "Run `python -m src.db.migrate` first."
+        )
+    if version > HEAD:
+        print(f"Database schema is at revision {version}, ahead of this code ({HEAD})")
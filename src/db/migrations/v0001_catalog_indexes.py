@@ -0,0 +1,51 @@
+from sqlalchemy import Connection, text
+
+revision = 1
+description = "catalog indexes and full text search over cars"
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_cars_created_at ON cars (created_at, uid)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_brand ON cars (brand, created_at, uid)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_fuel_type ON cars (fuel_type, created_at, uid)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_transmission "
+    "ON cars (transmission, created_at, uid)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_price ON cars (price_per_day)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_vendor_id ON cars (vendor_id)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_car_id ON reviews (car_id)",
+]
+
+_POSTGRES_SEARCH = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_cars_search_tsv ON cars USING gin "
+    "((to_tsvector('simple', car_name || ' ' || brand || ' ' || car_category)))",
+    "CREATE INDEX IF NOT EXISTS ix_cars_search_trgm ON cars USING gin "
+    "((lower(car_name || ' ' || brand || ' ' || car_category)) gin_trgm_ops)",
+]
+
+_SQLITE_SEARCH = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cars_fts "
+    "USING fts5(uid UNINDEXED, car_name, brand, car_category)",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_insert AFTER INSERT ON cars BEGIN "
+    "INSERT INTO cars_fts (uid, car_name, brand, car_category) "
+    "VALUES (new.uid, new.car_name, new.brand, new.car_category); END",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_delete AFTER DELETE ON cars BEGIN "
+    "DELETE FROM cars_fts WHERE uid = old.uid; END",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_update "
+    "AFTER UPDATE OF car_name, brand, car_category ON cars BEGIN "
+    "UPDATE cars_fts SET car_name = new.car_name, brand = new.brand, "
+    "car_category = new.car_category WHERE uid = old.uid; END",
+    # the triggers only see new writes, index the cars already there
+    "INSERT INTO cars_fts (uid, car_name, brand, car_category) "
+    "SELECT uid, car_name, brand, car_category FROM cars",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    statements = list(_INDEXES)
+    if conn.dialect.name == "postgresql":
+        statements += _POSTGRES_SEARCH
+    elif conn.dialect.name == "sqlite":
+        statements += _SQLITE_SEARCH
+
+    for statement in statements:
+        conn.execute(text(statement))
@@ -0,0 +1,21 @@
+from sqlalchemy import Connection, text
+
+revision = 2
+description = "rating aggregates on cars, backfilled from reviews"
+
+_STATEMENTS = [
+    "ALTER TABLE cars ADD COLUMN rating_count INTEGER DEFAULT '0' NOT NULL",
+    "ALTER TABLE cars ADD COLUMN rating_sum INTEGER DEFAULT '0' NOT NULL",
+    "ALTER TABLE cars ADD COLUMN rating_avg FLOAT",
+    "UPDATE cars SET "
+    "rating_count = (SELECT count(*) FROM reviews WHERE reviews.car_id = cars.uid), "
+    "rating_sum = (SELECT coalesce(sum(rating), 0) FROM reviews "
+    "WHERE reviews.car_id = cars.uid), "
+    "rating_avg = (SELECT avg(rating) FROM reviews WHERE reviews.car_id = cars.uid)",
+    "CREATE INDEX IF NOT EXISTS ix_cars_rating ON cars (rating_avg)",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for statement in _STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,31 @@
+from sqlalchemy import Connection, inspect, text
+
+revision = 3
+description = "date range availability: drop cars.is_booked, index booking periods"
+
+
+def upgrade(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("cars")}
+    if "is_booked" in columns:
+        conn.execute(text("ALTER TABLE cars DROP COLUMN is_booked"))
+
+    active = (
+        "is_active = true" if conn.dialect.name == "postgresql" else "is_active = 1"
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_booking_active_car_period "
+            f"ON booking (car_id, start_date, end_date) WHERE {active}"
+        )
+    )
+
+    if conn.dialect.name == "postgresql":
+        # fails if the table already holds overlapping active bookings,
+        # those have to be cancelled by hand first
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        conn.execute(
+            text(
+                "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+                "(car_id WITH =, tsrange(start_date, end_date) WITH &&) WHERE (is_active)"
+            )
+        )
@@ -0,0 +1,50 @@
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Uuid,
+    text,
+)
+
+revision = 4
+description = "append only wallet ledger, Wallet.credit becomes its snapshot"
+
+metadata = MetaData()
+
+# only referenced by the foreign keys, not created
+Table("wallet", metadata, Column("uid", Uuid, primary_key=True))
+Table("booking", metadata, Column("uid", Uuid, primary_key=True))
+
+walletledger = Table(
+    "walletledger",
+    metadata,
+    Column("seq", Integer, primary_key=True),
+    Column("wallet_id", Uuid, ForeignKey("wallet.uid"), nullable=False),
+    Column(
+        "entry_type",
+        Enum(
+            "TOP_UP", "BOOKING_DEBIT", "VENDOR_CREDIT", "REFUND", name="ledgerentrytype"
+        ),
+        nullable=False,
+    ),
+    Column("amount", Float, nullable=False),
+    Column("booking_id", Uuid, ForeignKey("booking.uid")),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_walletledger_wallet_seq", "wallet_id", "seq"),
+    Index("ix_walletledger_created_at", "created_at"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    # existing balances become snapshots that include no entry yet
+    conn.execute(
+        text("ALTER TABLE wallet ADD COLUMN ledger_seq INTEGER DEFAULT '0' NOT NULL")
+    )
+    walletledger.create(conn)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Connection, DateTime, Index, MetaData, String, Table
+
+revision = 5
+description = "revoked access tokens for logout"
+
+metadata = MetaData()
+
+revokedtoken = Table(
+    "revokedtoken",
+    metadata,
+    Column("jti", String, primary_key=True),
+    Column("expires_at", DateTime, nullable=False),
+    Column("revoked_at", DateTime, nullable=False),
+    Index("ix_revokedtoken_expires_at", "expires_at"),
+    Index("ix_revokedtoken_revoked_at", "revoked_at"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    revokedtoken.create(conn)
@@ -0,0 +1,54 @@
+from sqlalchemy import Connection, text
+
+revision = 6
+description = "case-insensitive unique emails and business names"
+
+
+def _rename_duplicates(conn: Connection, table: str, column: str, rename) -> None:
+    # in every group only differing by case the oldest account keeps the value,
+    # the others are renamed (and printed, so support can reach them)
+    rows = conn.execute(
+        text(
+            f"SELECT uid, {column} FROM {table} WHERE lower({column}) IN "
+            f"(SELECT lower({column}) FROM {table} WHERE {column} IS NOT NULL "
+            f"GROUP BY lower({column}) HAVING count(*) > 1) "
+            f"ORDER BY lower({column}), created_at"
+        )
+    ).all()
+
+    kept = set()
+    for uid, value in rows:
+        if value.lower() not in kept:
+            kept.add(value.lower())
+            continue
+
+        new_value = rename(str(uid).replace("-", "")[:8], value)
+        print(f"{table} {uid}: {column} {value!r} -> {new_value!r}")
+        conn.execute(
+            text(f"UPDATE {table} SET {column} = :value WHERE uid = :uid"),
+            {"value": new_value, "uid": uid},
+        )
+
+
+def upgrade(conn: Connection) -> None:
+    for table in ("customers", "vendors"):
+        _rename_duplicates(
+            conn, table, "email", lambda uid, email: f"duplicate-{uid}-{email}"
+        )
+        conn.execute(text(f"UPDATE {table} SET email = lower(email)"))
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_email "
+                f"ON {table} (lower(email))"
+            )
+        )
+
+    _rename_duplicates(
+        conn, "vendors", "business_name", lambda uid, name: f"{name} ({uid})"
+    )
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_vendors_business_name "
+            "ON vendors (lower(business_name))"
+        )
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Connection, text
+
+revision = 7
+description = "index for the catalog sorted by rating"
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_cars_rating_order "
+            "ON cars (coalesce(rating_avg, 0), created_at, uid)"
+        )
+    )
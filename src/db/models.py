@@ -1,14 +1,35 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional, List
 import uuid
+from sqlalchemy import DDL, Index, event, text
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import EmailStr
 
 # from src.booking_table.schemas import BookingStatus
 
+# relationships never load on their own (lazy="raise"). a query that needs one
+# asks for it with .options(selectinload(...)) or session.refresh(obj, ["name"]),
+# touching one that was not loaded raises instead of quietly running more queries
+
 
 # ---------------------- CARS MODEL ----------------------
 class Cars(SQLModel, table=True):
+    # catalog query: optional brand / fuel_type / transmission / price range,
+    # ordered by (created_at, uid) desc for the cursor
+    __table_args__ = (
+        Index("ix_cars_created_at", "created_at", "uid"),
+        Index("ix_cars_brand", "brand", "created_at", "uid"),
+        Index("ix_cars_fuel_type", "fuel_type", "created_at", "uid"),
+        Index("ix_cars_transmission", "transmission", "created_at", "uid"),
+        Index("ix_cars_price", "price_per_day"),
+        Index("ix_cars_rating", "rating_avg"),
+        # sort=rating, best rated first with unrated cars as 0
+        Index(
+            "ix_cars_rating_order", text("coalesce(rating_avg, 0)"), "created_at", "uid"
+        ),
+    )
+
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     car_name: str
     image_url: str
@@ -21,23 +42,31 @@ class Cars(SQLModel, table=True):
     price_per_day: float
     registration_no: str
     transmission: str
-    is_booked: bool = Field(default=False)
+
+    # review aggregates, kept up to date by the review services so nobody
+    # has to load every review to know a car's rating
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_avg: Optional[float] = Field(default=None)
+
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    vendor_id: uuid.UUID = Field(foreign_key="vendors.uid")
+    vendor_id: uuid.UUID = Field(foreign_key="vendors.uid", index=True)
 
     # Relationship with Reviews
     reviews: List["Reviews"] = Relationship(
-        back_populates="car", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="car", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     # Relationship with Vendors
     vendor: "Vendors" = Relationship(
-        back_populates="cars", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="cars", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     # Relationship with Booking
-    bookings: List["Booking"] = Relationship(back_populates="car")
+    bookings: List["Booking"] = Relationship(
+        back_populates="car", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
 
 # ---------------------- BASE USER MODEL ----------------------
@@ -50,6 +79,9 @@ class BaseUser(SQLModel):
 
 # ---------------------- CUSTOMERS MODEL ----------------------
 class Customers(BaseUser, table=True):
+    # emails are unique whatever their case and looked up through lower(email)
+    __table_args__ = (Index("ux_customers_email", text("lower(email)"), unique=True),)
+
     first_name: str
     last_name: str
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -57,12 +89,18 @@ class Customers(BaseUser, table=True):
 
     # Relationship with Reviews
     reviews: List["Reviews"] = Relationship(
-        back_populates="customer", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="customer", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
 # ---------------------- VENDORS MODEL ----------------------
 class Vendors(BaseUser, table=True):
+    # same for business names, individuals have none and NULLs never collide
+    __table_args__ = (
+        Index("ux_vendors_email", text("lower(email)"), unique=True),
+        Index("ux_vendors_business_name", text("lower(business_name)"), unique=True),
+    )
+
     first_name: Optional[str] = None  # For individuals
     last_name: Optional[str] = None  # For individuals
     business_name: Optional[str] = None  # For businesses
@@ -72,7 +110,7 @@ class Vendors(BaseUser, table=True):
 
     # Relationship with cars
     cars: List["Cars"] = Relationship(
-        back_populates="vendor", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="vendor", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
@@ -80,7 +118,7 @@ class Vendors(BaseUser, table=True):
 class Reviews(SQLModel, table=True):
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     customer_id: uuid.UUID = Field(foreign_key="customers.uid")
-    car_id: uuid.UUID = Field(foreign_key="cars.uid")
+    car_id: uuid.UUID = Field(foreign_key="cars.uid", index=True)
 
     rating: int = Field(..., ge=1, le=5)  # Rating between 1 and 5
     review_text: Optional[str] = None
@@ -89,15 +127,28 @@ class Reviews(SQLModel, table=True):
 
     # Relationships
     customer: "Customers" = Relationship(
-        back_populates="reviews", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
     )
     car: "Cars" = Relationship(
-        back_populates="reviews", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
 # ---------------------- BOOKING TABLE ----------------------
 class Booking(SQLModel, table=True):
+    # availability is "no active booking of the car overlaps the period",
+    # this index answers it with a range scan inside one car
+    __table_args__ = (
+        Index(
+            "ix_booking_active_car_period",
+            "car_id",
+            "start_date",
+            "end_date",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     customer_id: uuid.UUID = Field(foreign_key="customers.uid")
     vendor_id: uuid.UUID = Field(foreign_key="vendors.uid")
@@ -108,7 +159,31 @@ class Booking(SQLModel, table=True):
     is_active: bool = Field(default=True)
 
     car: Optional["Cars"] = Relationship(
-        back_populates="bookings", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="bookings", sa_relationship_kwargs={"lazy": "raise"}
+    )
+
+
+# on postgres the database itself refuses overlapping active bookings of a car,
+# so two concurrent bookings can never both go through
+for statement in [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+    "(car_id WITH =, tsrange(start_date, end_date) WITH &&) WHERE (is_active)",
+]:
+    event.listen(
+        Booking.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+
+
+# ---------------------- REVOKED TOKENS TABLE ----------------------
+class RevokedToken(SQLModel, table=True):
+    # jti of a logged out access token, kept until the token expires anyway
+    jti: str = Field(primary_key=True)
+    expires_at: datetime = Field(index=True)
+    revoked_at: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, index=True
     )
 
 
@@ -139,18 +214,32 @@ class Wallet(SQLModel, table=True):
     customer_id: Optional[uuid.UUID] = Field(default=None, foreign_key="customers.uid")
     vendor_id: Optional[uuid.UUID] = Field(default=None, foreign_key="vendors.uid")
 
+    # materialized balance: every ledger entry up to ledger_seq is included in
+    # credit, the current balance is credit + the entries after it.
+    # never change it in python, entries go through WalletService
     credit: float
-
-    def __iadd__(self, amount: float):
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Can only add a number to Wallet")
-        self.credit += amount
-        return self
-
-    def __isub__(self, amount: float):
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Can only add a number to Wallet")
-        if amount > self.credit:
-            raise ValueError("insufficient balance")
-        self.credit -= amount
-        return self
+    ledger_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+
+# ---------------------- WALLET LEDGER TABLE ----------------------
+class LedgerEntryType(str, Enum):
+    TOP_UP = "top_up"
+    BOOKING_DEBIT = "booking_debit"
+    VENDOR_CREDIT = "vendor_credit"
+    REFUND = "refund"
+
+
+class WalletLedger(SQLModel, table=True):
+    # append only, rows are never updated or deleted.
+    # (wallet_id, seq) makes "entries after the snapshot" a range scan
+    __table_args__ = (Index("ix_walletledger_wallet_seq", "wallet_id", "seq"),)
+
+    # an increasing sequence and not a uuid, snapshots remember how far they got
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    wallet_id: uuid.UUID = Field(foreign_key="wallet.uid")
+    entry_type: LedgerEntryType
+    amount: float  # signed, debits are negative
+    booking_id: Optional[uuid.UUID] = Field(default=None, foreign_key="booking.uid")
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, index=True
+    )
@@ -0,0 +1,24 @@
+"""
+Backfills / repairs the rating aggregates stored on Cars from the Reviews table.
+
+Run it once after adding the rating columns, or whenever they are suspected to drift:
+
+    python -m src.review.reconcile
+"""
+
+import asyncio
+
+from src.db.main import AsyncSessionLocal, async_engine
+from src.vehicles.service import CarService
+
+
+async def reconcile():
+    async with AsyncSessionLocal() as session:
+        updated = await CarService().reconcile_ratings(session)
+        await session.commit()
+    await async_engine.dispose()
+    print(f"Reconciled ratings of {updated} cars")
+
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
@@ -3,12 +3,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .schemas import ReviewCreateModel, ReviewResponseModel, ReviewUpdateModel
 from src.db.main import get_async_session
+from src.serialization import FastJSONRoute
 from .service import ReviewService
 from src.auth.Dependencies import review_dependency, get_logged_user
 from src.db.models import BaseUser
 
 
-review_router = APIRouter()
+review_router = APIRouter(route_class=FastJSONRoute)
 review_service = ReviewService()
 
 
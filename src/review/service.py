@@ -80,10 +80,12 @@ class ReviewService:
         review_data["customer_id"] = current_user.uid
         new_review = Reviews(**review_data)
 
-        # Add to session and commit
+        # Add to session and commit together with the car's rating
         session.add(new_review)
+        await self.car_service.update_rating(car_uid, 1, new_review.rating, session)
         await session.commit()
         await session.refresh(new_review)
+        await session.refresh(new_review, ["customer"])
 
         return new_review
 
@@ -105,6 +107,9 @@ class ReviewService:
 
         # Update allowed fields
         if updated_review.rating is not None:
+            await self.car_service.update_rating(
+                review.car_id, 0, updated_review.rating - review.rating, session
+            )
             review.rating = updated_review.rating
 
         review.review_text = updated_review.review_text
@@ -112,6 +117,7 @@ class ReviewService:
         # Save changes
         await session.commit()
         await session.refresh(review)
+        await session.refresh(review, ["customer"])
 
         return review
 
@@ -124,6 +130,9 @@ class ReviewService:
         if not reviewed:
             return  # will raise an HTTPException
 
+        await self.car_service.update_rating(
+            reviewed.car_id, -1, -reviewed.rating, session
+        )
         await session.delete(reviewed)
         await session.commit()
         return {"message": "review deleted successfully"}
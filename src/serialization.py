@@ -0,0 +1,188 @@
+import asyncio
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import TypeAdapter, ValidationError
+from starlette.routing import request_response
+
+try:
+    import msgpack
+except ImportError:  # optional, everything is json without it
+    msgpack = None
+
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class ModelSerializer:
+    """
+    Turns what a handler returns (ORM rows, schema instances, dicts of them) into
+    its response_model's JSON in one pass.
+    FastAPI's own path dumps every pydantic model back to a dict, validates the dict
+    again, builds jsonable python and then runs the stdlib json over it. Here the
+    content is validated once (from_attributes, model instances go through untouched)
+    and pydantic-core writes the bytes straight from the compiled schema.
+    """
+
+    def __init__(self, annotation: Any) -> None:
+        self.adapter = TypeAdapter(annotation)
+
+    def validate(self, content: Any) -> Any:
+        try:
+            return self.adapter.validate_python(content, from_attributes=True)
+        except ValidationError as exc:
+            # same 500 FastAPI raises when a handler returns something off-model
+            raise ResponseValidationError(
+                errors=exc.errors(include_url=False), body=content
+            )
+
+    def to_json(self, content: Any) -> bytes:
+        return self.adapter.dump_json(self.validate(content), by_alias=True)
+
+    def to_python(self, content: Any) -> Any:
+        # plain str / int / list / dict, for encoders other than json
+        return self.adapter.dump_python(
+            self.validate(content), mode="json", by_alias=True
+        )
+
+    def to_msgpack(self, content: Any) -> bytes:
+        return msgpack.packb(self.to_python(content))
+
+
+# built once per response model, the schema is compiled when the adapter is made
+@lru_cache(maxsize=None)
+def get_serializer(annotation: Any) -> ModelSerializer:
+    return ModelSerializer(annotation)
+
+
+def _media_ranges(header: str):
+    for part in header.split(","):
+        media_type, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        yield media_type.strip().lower(), q
+
+
+def wants_msgpack(accept: str) -> bool:
+    """
+    True when the Accept header asks for msgpack over json. Wildcards count for
+    json, a tie goes to json too, so browsers and old clients never see msgpack.
+    """
+    if msgpack is None:
+        return False
+    msgpack_q = json_q = 0.0
+    for media_type, q in _media_ranges(accept):
+        if media_type in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > json_q
+
+
+def is_msgpack(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in MSGPACK_TYPES
+
+
+class MsgPackRequest(Request):
+    """
+    A msgpack request body dressed up as json: FastAPI only parses bodies whose
+    content type is json, and reads them through Request.json().
+    """
+
+    def __init__(self, request: Request) -> None:
+        headers = [
+            (name, value)
+            for name, value in request.scope["headers"]
+            if name != b"content-type"
+        ]
+        headers.append((b"content-type", b"application/json"))
+        super().__init__({**request.scope, "headers": headers}, request.receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+# which encoding the current request asked for, set by FastJSONRoute
+response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route class (APIRouter(route_class=FastJSONRoute)) that encodes responses with
+    a ModelSerializer, the route's response_model or Any when it has none.
+    The handler's result is turned into a Response before FastAPI sees it, so
+    FastAPI skips its own validate + serialize pass.
+    Clients sending `Accept: application/msgpack` get msgpack from the same
+    serializer, and may send msgpack bodies (Content-Type: application/msgpack)
+    wherever a json body is accepted. Both need the msgpack package.
+    Routes without a body (204) or with a sync handler keep the default path.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint, **kwargs)
+        status_code = self.status_code or 200
+        if not is_body_allowed_for_status_code(
+            status_code
+        ) or not asyncio.iscoroutinefunction(self.dependant.call):
+            return
+
+        self.serializer = get_serializer(
+            self.response_model if self.response_field is not None else Any
+        )
+        handler = self.dependant.call
+
+        async def serialize(**values: Any) -> Any:
+            content = await handler(**values)
+            if isinstance(content, Response):
+                return content
+            if response_format.get() == "msgpack":
+                body = self.serializer.to_msgpack(content)
+                media_type = MSGPACK_TYPES[0]
+            else:
+                body = self.serializer.to_json(content)
+                media_type = "application/json"
+            return Response(
+                body,
+                status_code=status_code,
+                media_type=media_type,
+                headers={"Vary": "Accept"},
+            )
+
+        self.dependant.call = serialize
+        self.app = request_response(self.get_route_handler())
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def negotiating_route_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type", "")):
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="msgpack bodies are not supported by this server",
+                    )
+                request = MsgPackRequest(request)
+
+            encoding = "json"
+            if wants_msgpack(request.headers.get("accept", "")):
+                encoding = "msgpack"
+            token = response_format.set(encoding)
+            try:
+                return await route_handler(request)
+            finally:
+                response_format.reset(token)
+
+        return negotiating_route_handler
@@ -0,0 +1,117 @@
+"""
+Production server: several uvicorn workers on uvloop and httptools.
+
+    python -m src.serve                   WEB_CONCURRENCY workers, one per core if unset
+    python -m src.serve --workers 4 --port 8000
+    python -m src.serve --migrate         migrate once before any worker starts
+
+Workers are fresh processes (uvicorn spawns them), each imports the app and builds
+its own engine and connection pool, nothing database related is shared with this
+process. Each holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections (twice that
+with a read replica) plus one for /readyz, the database has to allow that many
+for all workers.
+On SIGTERM / SIGINT workers stop accepting, give in-flight requests up to
+--graceful-timeout seconds and close their pools on the way out.
+Migrations never run in the workers, use --migrate or `python -m src.db.migrate`.
+Behind a load balancer list its address in FORWARDED_ALLOW_IPS (or "*" when only
+the balancer can reach the workers): the client ip the app sees, and the login
+throttle keys on, comes from X-Forwarded-For only for those peers.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+
+import uvicorn
+
+from src.config import Config
+
+
+def _available(module: str, fallback: str) -> str:
+    if importlib.util.find_spec(module) is not None:
+        return module
+    print(f"{module} is not installed, using {fallback}")
+    return fallback
+
+
+async def migrate() -> None:
+    from src.db.main import async_engine
+    from src.db.migrations import upgrade
+
+    try:
+        version = await upgrade()
+        print(f"Schema is at revision {version}")
+    finally:
+        # the workers make their own connections, none are kept from here
+        await async_engine.dispose()
+
+
+def main(args) -> None:
+    if args.migrate:
+        asyncio.run(migrate())
+
+    print(
+        f"Starting {args.workers} workers, up to "
+        f"{Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW + 1} database connections each"
+    )
+    uvicorn.run(
+        "src:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=_available("uvloop", "asyncio"),
+        http=_available("httptools", "h11"),
+        limit_concurrency=args.limit_concurrency,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        access_log=args.access_log,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=Config.WEB_CONCURRENCY or os.cpu_count() or 1
+    )
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=Config.SERVER_LIMIT_CONCURRENCY,
+        help="open connections + tasks per worker before answering 503",
+    )
+    parser.add_argument("--backlog", type=int, default=Config.SERVER_BACKLOG)
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=Config.SERVER_KEEP_ALIVE_SECONDS,
+        help="seconds an idle keep-alive connection stays open",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=Config.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        help="seconds in-flight requests get on shutdown",
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips",
+        default=Config.FORWARDED_ALLOW_IPS,
+        help="proxies trusted to set X-Forwarded-For, comma separated or *",
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="apply pending migrations once before starting the workers",
+    )
+    parser.add_argument(
+        "--no-access-log", dest="access_log", action="store_false", default=True
+    )
+    main(parser.parse_args())
@@ -1,25 +1,45 @@
+import math
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.auth.Dependencies import (
     customer_dependency,
     get_logged_user,
+    get_token_data,
     vendor_dependency,
 )
 
+from src.auth.throttle import login_throttle
 from src.db.main import get_async_session
+from src.serialization import FastJSONRoute
 from src.db.models import BaseUser
 from .service import CustomerService, VendorService
 from . import schemas
 
-customer_router = APIRouter()
-vendor_router = APIRouter()
+customer_router = APIRouter(route_class=FastJSONRoute)
+vendor_router = APIRouter(route_class=FastJSONRoute)
 
 customer_service = CustomerService()
 vendor_service = VendorService()
 
 
+# runs before the login so throttled attempts never reach the database or bcrypt.
+# the attempt is counted as failed from here on, a good password takes it back.
+# behind a proxy request.client is the real client only when the server trusts
+# its X-Forwarded-For (FORWARDED_ALLOW_IPS, see src/serve.py)
+async def check_login_throttle(role: str, email: str, request: Request) -> str:
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = await login_throttle.attempt(role, email, client_ip)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return client_ip
+
+
 @customer_router.post(
     "/signup",
     response_model=schemas.CustomerResponseModel,
@@ -42,12 +62,15 @@ async def customer_signup(
 
 @customer_router.post("/login", status_code=status.HTTP_202_ACCEPTED)
 async def customer_login(
+    request: Request,
     customer_credentials: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_async_session),
 ):
+    email = customer_credentials.username
+    client_ip = await check_login_throttle("Customer", email, request)
 
     customer_token = await customer_service.login(
-        customer_credentials.username, customer_credentials.password, session
+        email, customer_credentials.password, session
     )
 
     if not customer_token:
@@ -56,9 +79,26 @@ async def customer_login(
             detail="Invalid credentials.",
         )
 
+    await login_throttle.succeeded("Customer", email, client_ip)
     return customer_token
 
 
+@customer_router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[customer_dependency],
+)
+async def customer_logout(
+    token_data: dict = Depends(get_token_data),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if not await customer_service.log_out(token_data, session):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token can not be logged out, log in again.",
+        )
+
+
 @customer_router.delete(
     "/delete",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -120,22 +160,43 @@ async def vendor_signup(
 
 @vendor_router.post("/login", status_code=status.HTTP_202_ACCEPTED)
 async def vendor_login(
+    request: Request,
     vendor_credentials: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_async_session),
 ):
+    email = vendor_credentials.username  # remember username is email in our system
+    client_ip = await check_login_throttle("Vendor", email, request)
 
     vendor_token = await vendor_service.login(
-        vendor_credentials.username, vendor_credentials.password, session
-    )  # remember username is email in our system
+        email, vendor_credentials.password, session
+    )
 
     if not vendor_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
         )
+
+    await login_throttle.succeeded("Vendor", email, client_ip)
     return vendor_token
 
 
+@vendor_router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[vendor_dependency],
+)
+async def vendor_logout(
+    token_data: dict = Depends(get_token_data),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if not await vendor_service.log_out(token_data, session):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token can not be logged out, log in again.",
+        )
+
+
 @vendor_router.delete(
     "/delete", status_code=status.HTTP_204_NO_CONTENT, dependencies=[vendor_dependency]
 )
@@ -160,7 +221,7 @@ async def get_logged_vendor(
     session: AsyncSession = Depends(get_async_session),
 ):
 
-    me = await vendor_service.get_vendor_by_email(currentUser.email, session)
+    me = await vendor_service.get_vendor_profile(currentUser.email, session)
 
     if not me:
         raise HTTPException(
@@ -1,13 +1,19 @@
 from abc import ABC, abstractmethod
+from datetime import datetime, timezone
 from typing import Generic, Optional, Sequence, Type, TypeVar
 import uuid
 
 # import uuid
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from sqlmodel import select
 
 from src import utils
+from src.auth.Dependencies import forget_user
 from src.auth.oauth2 import AuthService
+from src.auth.revocation import token_denylist
 from src.booking_table.schemas import CreateBookingModel
 from . import schemas
 
@@ -32,9 +38,15 @@ class UserService(ABC, Generic[T]):
 
     # get user by email method
     async def get_user_by_email(
-        self, email: str, db_model: Type[T], session: AsyncSession
+        self, email: str, db_model: Type[T], session: AsyncSession, *options
     ) -> Optional[T]:
-        statement = select(db_model).where(db_model.email == email)
+        # an index probe on ux_<table>_email, options load the relationships
+        # the caller needs (none by default)
+        statement = (
+            select(db_model)
+            .where(func.lower(db_model.email) == email.lower())
+            .options(*options)
+        )
         result = await session.exec(statement)
         user = result.first()
         return user
@@ -56,9 +68,17 @@ class UserService(ABC, Generic[T]):
     ) -> Optional[int]:
         pass
 
-    #  Incomplete method for logout
-    async def log_out(self):
-        pass
+    # logout revokes the token until it expires. tokens issued before logout
+    # existed carry no jti, there is nothing to revoke them by
+    async def log_out(self, token_data: dict, session: AsyncSession) -> Optional[bool]:
+        jti = token_data.get("jti")
+        exp = token_data.get("exp")
+        if jti is None or exp is None:
+            return None
+
+        expires_at = datetime.fromtimestamp(exp, timezone.utc)
+        await token_denylist.revoke(jti, expires_at.replace(tzinfo=None), session)
+        return True
 
 
 class CustomerService(UserService[Customers]):
@@ -79,22 +99,24 @@ class CustomerService(UserService[Customers]):
         session: AsyncSession,
     ):
 
-        customer = await self.get_customer_by_email(user_data.email, session)
-        if customer:
-            return
-
-        hashed_password = utils.hash_password(user_data.password)
+        hashed_password = await utils.password_hasher.hash(user_data.password)
         user_data.password = hashed_password
+        user_data.email = user_data.email.lower()
         new_customer = Customers(**user_data.model_dump())
-        session.add(new_customer)
-        await session.commit()
-        await session.refresh(new_customer)
 
         # Create wallet with initial 10,000 credits
         new_wallet = Wallet(customer_id=new_customer.uid, credit=10000.0)
-        session.add(new_wallet)
-        await session.commit()
-        await session.refresh(new_wallet)
+
+        # no lookup first, the unique index decides, even between two
+        # signups racing for the same email
+        session.add_all([new_customer, new_wallet])
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return
+
+        await session.refresh(new_customer)
         return new_customer
 
     # login for customer
@@ -103,10 +125,10 @@ class CustomerService(UserService[Customers]):
         if not customer:
             return
 
-        verify_pass = utils.verify_password(password, customer.password)
+        verify_pass = await utils.password_hasher.verify(password, customer.password)
         if not verify_pass:
             return
-        token_data = schemas.TokenDataModel(email=email, role="Customer")
+        token_data = schemas.TokenDataModel(email=customer.email, role="Customer")
         token = self.auth_service.create_access_token(data=token_data.model_dump())
 
         return schemas.Token(access_token=token)
@@ -119,11 +141,14 @@ class CustomerService(UserService[Customers]):
         if not customer:
             return
 
-        if not utils.verify_password(user_data.password, customer.password):
+        if not await utils.password_hasher.verify(
+            user_data.password, customer.password
+        ):
             return
 
         await session.delete(customer)
         await session.commit()
+        forget_user("Customer", customer.email)
         return 200
 
 
@@ -139,6 +164,13 @@ class VendorService(UserService[Vendors]):
         vendor = await self.get_user_by_email(email, Vendors, session)
         return vendor
 
+    # the vendor's own profile, with their cars
+    async def get_vendor_profile(self, email, session: AsyncSession):
+        vendor = await self.get_user_by_email(
+            email, Vendors, session, selectinload(Vendors.cars)
+        )
+        return vendor
+
     # signup for vendor
     async def sign_up(
         self,
@@ -146,31 +178,24 @@ class VendorService(UserService[Vendors]):
         session: AsyncSession,
     ):
 
-        vendor = await self.get_vendor_by_email(user_data.email, session)
-        if vendor:
-            return
-
-        if user_data.business_name:
-            statement = select(Vendors).where(
-                Vendors.business_name == user_data.business_name
-            )
-            find_business = await session.exec(statement)
-            business = find_business.first()
-            if business:
-                return
-
-        hashed_password = utils.hash_password(user_data.password)
+        hashed_password = await utils.password_hasher.hash(user_data.password)
         user_data.password = hashed_password
+        user_data.email = user_data.email.lower()
         new_vendor = Vendors(**user_data.model_dump())
-        session.add(new_vendor)
-        await session.commit()
-        await session.refresh(new_vendor)
 
         # Create wallet with initial 0 credits for vendor
         new_wallet = Wallet(vendor_id=new_vendor.uid, credit=0.0)
-        session.add(new_wallet)
-        await session.commit()
-        await session.refresh(new_wallet)
+
+        # email and business name uniqueness are left to the unique indexes
+        session.add_all([new_vendor, new_wallet])
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return
+
+        await session.refresh(new_vendor)
+        await session.refresh(new_vendor, ["cars"])
         return new_vendor
 
     # login for vendor
@@ -179,12 +204,12 @@ class VendorService(UserService[Vendors]):
         if not vendor:
             return
 
-        verify_pass = utils.verify_password(password, vendor.password)
+        verify_pass = await utils.password_hasher.verify(password, vendor.password)
 
         if not verify_pass:
             return
 
-        token_data = schemas.TokenDataModel(email=email, role="Vendor")
+        token_data = schemas.TokenDataModel(email=vendor.email, role="Vendor")
         token = self.auth_service.create_access_token(data=token_data.model_dump())
 
         return schemas.Token(access_token=token)
@@ -197,11 +222,12 @@ class VendorService(UserService[Vendors]):
         if not vendor:
             return
 
-        if not utils.verify_password(user_data.password, vendor.password):
+        if not await utils.password_hasher.verify(user_data.password, vendor.password):
             return
 
         await session.delete(vendor)
         await session.commit()
+        forget_user("Vendor", vendor.email)
         return 200
 
     async def get_my_customers(self, vendor_uid: uuid.UUID, session: AsyncSession):
@@ -216,15 +242,11 @@ class VendorService(UserService[Vendors]):
         data = result.all()
         response_data = []
 
+        # the rows go in as they are, model_validate on a table model would
+        # read (and trip over) every unloaded relationship while copying it
         for booking, customer in data:
-            booking_response = Booking.model_validate(booking)
-            customer_response = Customers.model_validate(customer)
             response_data.append(
-                [
-                    schemas.GetMyCustomerResponse(
-                        booking=booking_response, customer=customer_response
-                    )
-                ]
+                [schemas.GetMyCustomerResponse(booking=booking, customer=customer)]
             )
 
         return response_data
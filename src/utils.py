@@ -1,7 +1,19 @@
+import asyncio
+import base64
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
 from passlib.context import CryptContext
 
+from src.config import Config
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+R = TypeVar("R")
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +21,108 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool so hashing never blocks the event loop.
+    bcrypt releases the GIL while it works, so the threads really run in parallel.
+    Calls beyond `workers` wait in the pool's queue, stats() shows how deep it is
+    (reported by /readyz).
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        # only touched from the event loop, no lock needed
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+
+    async def _run(self, func: Callable[..., R], *args) -> R:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "running": min(self.in_flight, self.workers),
+            "queued": max(self.in_flight - self.workers, 0),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(Config.PASSWORD_HASH_WORKERS)
+
+
+# cursors are opaque to the client, they only hand back what we gave them.
+# lead is the leading sort value (search rank or rating), set when the page is
+# not ordered by created_at alone, sort is only written when it is not "newest"
+CURSOR_SORTS = ("newest", "rating")
+
+
+def encode_cursor(
+    created_at: datetime,
+    uid: uuid.UUID,
+    lead: Optional[float] = None,
+    sort: str = "newest",
+) -> str:
+    key = [created_at.isoformat(), uid.hex]
+    if lead is not None or sort != "newest":
+        key.append(lead)
+    if sort != "newest":
+        key.append(sort)
+    raw = json.dumps(key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+) -> Tuple[datetime, uuid.UUID, Optional[float], str]:
+    """
+    Returns (created_at, uid, lead, sort).
+    Raises ValueError if the cursor was not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(key, list) or len(key) not in (2, 3, 4):
+            raise ValueError("invalid cursor")
+        # anything can be sent back, check the types before converting them
+        created_at, uid = key[0], key[1]
+        lead = key[2] if len(key) > 2 else None
+        sort = key[3] if len(key) == 4 else "newest"
+        if not isinstance(created_at, str) or not isinstance(uid, str):
+            raise ValueError("invalid cursor")
+        if lead is not None and (
+            isinstance(lead, bool) or not isinstance(lead, (int, float))
+        ):
+            raise ValueError("invalid cursor")
+        if not isinstance(sort, str) or sort not in CURSOR_SORTS:
+            raise ValueError("invalid cursor")
+        return (
+            datetime.fromisoformat(created_at),
+            uuid.UUID(uid),
+            float(lead) if lead is not None else None,
+            sort,
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
@@ -1,6 +1,7 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.Dependencies import (
@@ -8,34 +9,100 @@ from src.auth.Dependencies import (
     get_logged_user,
     vendor_dependency,
 )
-from src.db.main import get_async_session
+from src.db.main import get_async_read_session, get_async_session
+from src.serialization import FastJSONRoute
 from src.db.models import BaseUser
-from src.vehicles.schemas import CarCreateModel, CarGetModel, CarUpdateModel
+from src import utils
+from src.vehicles.schemas import (
+    CarCreateModel,
+    CarGetModel,
+    CarPageModel,
+    CarSummaryModel,
+    CarUpdateModel,
+)
 from src.vehicles.service import CarService
 
 
 # Routers
-vehicles_router = APIRouter()
+vehicles_router = APIRouter(route_class=FastJSONRoute)
 car_service = CarService()
 
 
-@vehicles_router.get("/cars", response_model=List[CarGetModel])
+@vehicles_router.get("/cars", response_model=Union[List[CarSummaryModel], CarPageModel])
 async def get_all_cars(
-    db: AsyncSession = Depends(get_async_session),
-    limit: int = 10,
-    offset: int = 0,
+    db: AsyncSession = Depends(get_async_read_session),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
     search: Optional[str] = None,
     brand: Optional[str] = None,
     price_gt: Optional[int] = None,
     price_lt: Optional[int] = None,
     transmission: Optional[str] = None,
     fuel_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    sort: Literal["newest", "rating"] = "newest",
 ):
     # print(logged_user.email)
-    cars = await car_service.get_all_cars(
-        db, limit, offset, search, brand, price_gt, price_lt, transmission, fuel_type
+    # offset still works for old clients but cursor is the way to scroll deep.
+    # without a cursor the answer is the plain list old clients expect, an empty
+    # `cursor=` asks for the first page as {cars, next_cursor}
+    decoded_cursor = None
+    if cursor:
+        try:
+            decoded_cursor = utils.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="invalid cursor",
+            )
+        if decoded_cursor[3] != sort:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor does not belong to this sort order",
+            )
+        # search pages are ordered by rank so their cursors carry one
+        if sort == "newest" and (search is None) != (decoded_cursor[2] is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor does not belong to this search",
+            )
+
+    # only cars free for the whole period, both ends are needed
+    available = None
+    if available_from is not None or available_to is not None:
+        if available_from is None or available_to is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="available_from and available_to must be given together",
+            )
+        if available_to <= available_from:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="available_to must be after available_from",
+            )
+        available = (available_from, available_to)
+
+    cars, next_cursor = await car_service.get_all_cars(
+        db,
+        limit,
+        offset,
+        search,
+        brand,
+        price_gt,
+        price_lt,
+        transmission,
+        fuel_type,
+        decoded_cursor,
+        min_rating,
+        available,
+        sort,
     )
-    return cars
+    if cursor is None:
+        return cars
+    return {"cars": cars, "next_cursor": next_cursor}
 
 
 @vehicles_router.get(
@@ -43,9 +110,9 @@ async def get_all_cars(
 )
 async def get_car(
     car_uid: uuid.UUID,
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_async_read_session),
 ):
-    car = await car_service.get_car(car_uid, db)
+    car = await car_service.get_car_detail(car_uid, db)
     if not car:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
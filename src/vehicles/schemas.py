@@ -27,6 +27,29 @@ class CarGetModel(CarCreateModel):
     updated_at: datetime
 
 
+class CarSummaryModel(BaseModel):
+    # what a catalog card shows, open the car detail for everything else
+    uid: uuid.UUID
+    car_name: str
+    image_url: str
+    model_year: str
+    brand: str
+    car_category: str
+    fuel_type: str
+    transmission: str
+    siting_capacity: int
+    price_per_day: float
+    created_at: datetime
+    review_count: int
+    average_rating: Optional[float] = None
+
+
+class CarPageModel(BaseModel):
+    cars: List[CarSummaryModel]
+    # pass this back as `cursor` to get the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
 class CarUpdateModel(BaseModel):
     # why default value as we are using this in patch operation where client may not provide all values
     # he can only provide the value which he want to upgrade
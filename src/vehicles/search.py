@@ -0,0 +1,157 @@
+import re
+from abc import ABC, abstractmethod
+from typing import List, TypeVar
+
+from sqlalchemy import DDL, event, func, literal, literal_column, or_
+from sqlalchemy.sql import column, table
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.expression import Select
+
+from src.db.models import Cars
+
+_TSelect = TypeVar("_TSelect", bound=Select)
+
+# car_name, brand and car_category are searched together as one document.
+# the expressions are spelled out as sql (no bind params) so postgres can
+# match them against the expression indexes below
+_PG_DOCUMENT = "cars.car_name || ' ' || cars.brand || ' ' || cars.car_category"
+_PG_TSVECTOR = literal_column(f"to_tsvector('simple', {_PG_DOCUMENT})")
+_PG_TRIGRAM_DOCUMENT = literal_column(f"lower({_PG_DOCUMENT})")
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_cars_search_tsv ON cars USING gin "
+    "((to_tsvector('simple', car_name || ' ' || brand || ' ' || car_category)))",
+    "CREATE INDEX IF NOT EXISTS ix_cars_search_trgm ON cars USING gin "
+    "((lower(car_name || ' ' || brand || ' ' || car_category)) gin_trgm_ops)",
+]
+
+# sqlite has no trigram index so we keep an fts5 table in sync with triggers.
+# it is keyed by uid and not rowid because cars has no INTEGER PRIMARY KEY
+# and its rowids are allowed to change on VACUUM
+_cars_fts = table("cars_fts", column("uid"), column("rank"))
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cars_fts "
+    "USING fts5(uid UNINDEXED, car_name, brand, car_category)",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_insert AFTER INSERT ON cars BEGIN "
+    "INSERT INTO cars_fts (uid, car_name, brand, car_category) "
+    "VALUES (new.uid, new.car_name, new.brand, new.car_category); END",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_delete AFTER DELETE ON cars BEGIN "
+    "DELETE FROM cars_fts WHERE uid = old.uid; END",
+    "CREATE TRIGGER IF NOT EXISTS cars_fts_update "
+    "AFTER UPDATE OF car_name, brand, car_category ON cars BEGIN "
+    "UPDATE cars_fts SET car_name = new.car_name, brand = new.brand, "
+    "car_category = new.car_category WHERE uid = old.uid; END",
+]
+
+for statement in _POSTGRES_DDL:
+    event.listen(
+        Cars.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
+
+for statement in _SQLITE_DDL:
+    event.listen(
+        Cars.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+
+def _tokens(term: str) -> List[str]:
+    # only word characters reach the query languages, so user input can never
+    # turn into tsquery / fts5 operators
+    return re.findall(r"\w+", term.lower())
+
+
+class CarSearch(ABC):
+    """
+    Full text search over car_name, brand and car_category.
+    Every word of the term is matched as a prefix ("toy cor" finds "Toyota Corolla").
+    """
+
+    @abstractmethod
+    def match(self, statement: _TSelect, term: str) -> _TSelect:
+        """
+        Narrows a select over Cars to the cars matching the term.
+        """
+        pass
+
+    @abstractmethod
+    def rank(self, term: str) -> ColumnElement[float]:
+        """
+        How well a car matches the term, higher is better.
+        Only meaningful in a statement that went through match().
+        """
+        pass
+
+
+class PostgresCarSearch(CarSearch):
+    # tsvector prefix search, trigram similarity catches typos ("corola")
+    def _ts_query(self, tokens: List[str]):
+        return func.to_tsquery(
+            literal_column("'simple'"), " & ".join(f"{token}:*" for token in tokens)
+        )
+
+    def match(self, statement, term):
+        tokens = _tokens(term)
+        if not tokens:
+            return statement
+
+        return statement.where(
+            or_(
+                _PG_TSVECTOR.op("@@")(self._ts_query(tokens)),
+                _PG_TRIGRAM_DOCUMENT.op("%")(" ".join(tokens)),
+            )
+        )
+
+    def rank(self, term):
+        tokens = _tokens(term)
+        if not tokens:
+            return literal(0.0)
+
+        return func.ts_rank(_PG_TSVECTOR, self._ts_query(tokens)) + func.similarity(
+            _PG_TRIGRAM_DOCUMENT, " ".join(tokens)
+        )
+
+
+class SqliteCarSearch(CarSearch):
+    def match(self, statement, term):
+        tokens = _tokens(term)
+        if not tokens:
+            return statement
+
+        fts_query = " ".join(f'"{token}"*' for token in tokens)
+        return statement.join(_cars_fts, _cars_fts.c.uid == Cars.uid).where(
+            literal_column("cars_fts").op("MATCH")(fts_query)
+        )
+
+    def rank(self, term):
+        if not _tokens(term):
+            return literal(0.0)
+
+        # fts5 rank is bm25 where lower is better
+        return -_cars_fts.c.rank
+
+
+class LikeCarSearch(CarSearch):
+    # for any other database, unindexed but still covers all three columns
+    def match(self, statement, term):
+        for token in _tokens(term):
+            statement = statement.where(
+                or_(
+                    func.lower(Cars.car_name).contains(token, autoescape=True),
+                    func.lower(Cars.brand).contains(token, autoescape=True),
+                    func.lower(Cars.car_category).contains(token, autoescape=True),
+                )
+            )
+        return statement
+
+    def rank(self, term):
+        return literal(0.0)
+
+
+def get_car_search(dialect_name: str) -> CarSearch:
+    if dialect_name == "postgresql":
+        return PostgresCarSearch()
+    if dialect_name == "sqlite":
+        return SqliteCarSearch()
+    return LikeCarSearch()
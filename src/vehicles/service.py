@@ -1,10 +1,57 @@
-from typing import Optional, Sequence
+from datetime import datetime
+from typing import List, Optional, Tuple
 import uuid
 from sqlmodel import desc, select
 from . import schemas
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.db.models import BaseUser, Cars
-from sqlalchemy import func
+from src import utils
+from src.cache import TTLCache
+from src.config import Config
+from src.db.models import BaseUser, Booking, Cars, Reviews
+from src.vehicles.search import get_car_search
+from sqlalchemy import Float, case, cast, func, literal_column, tuple_, update
+from sqlalchemy.orm import selectinload
+
+
+# a catalog card only needs these, so the listing never builds Cars objects
+_SUMMARY_COLUMNS = (
+    Cars.uid,
+    Cars.car_name,
+    Cars.image_url,
+    Cars.model_year,
+    Cars.brand,
+    Cars.car_category,
+    Cars.fuel_type,
+    Cars.transmission,
+    Cars.siting_capacity,
+    Cars.price_per_day,
+    Cars.created_at,
+    Cars.rating_count.label("review_count"),
+    Cars.rating_avg.label("average_rating"),
+)
+
+
+def overlapping_bookings(car_uid, start_date: datetime, end_date: datetime):
+    """
+    Active bookings of a car that overlap [start_date, end_date).
+    Served by ix_booking_active_car_period (and the gist exclusion index on postgres).
+    """
+    return select(Booking.uid).where(
+        Booking.car_id == car_uid,
+        Booking.is_active == True,
+        Booking.start_date < end_date,
+        Booking.end_date > start_date,
+    )
+
+
+# unrated cars rank below every rated one. the literal 0 (not a bound parameter)
+# keeps the expression identical to the one ix_cars_rating_order is built on
+_RATING_ORDER = func.coalesce(Cars.rating_avg, literal_column("0"))
+
+
+# anonymous catalog pages, keyed on the normalized filters and page.
+# cleared whenever a car is created, edited, deleted, booked or released
+catalog_cache = TTLCache(Config.CATALOG_CACHE_SIZE, Config.CATALOG_CACHE_TTL_SECONDS)
 
 
 class CarService:
@@ -19,7 +66,39 @@ class CarService:
         price_lt: Optional[int],
         transmission: Optional[str],
         fuel_type: Optional[str],
-    ) -> Sequence[Cars]:
+        cursor: Optional[Tuple[datetime, uuid.UUID, Optional[float], str]] = None,
+        min_rating: Optional[float] = None,
+        available: Optional[Tuple[datetime, datetime]] = None,
+        sort: str = "newest",
+    ) -> Tuple[List[schemas.CarSummaryModel], Optional[str]]:
+        """
+        Returns one page of car summaries and the cursor of the next page.
+        With `available` only cars with no active booking in that period are listed.
+        Cars come newest first, or best match first when searching;
+        sort="rating" lists the best rated first (unrated last), search or not.
+        With a cursor we seek straight past the last car the client has seen
+        instead of making the database walk over every skipped row like offset does.
+        """
+
+        if search is not None:
+            search = " ".join(search.lower().split())
+        cache_key = (
+            limit,
+            offset if cursor is None else None,
+            cursor,
+            search,
+            brand,
+            price_gt,
+            price_lt,
+            transmission,
+            fuel_type,
+            min_rating,
+            available,
+            sort,
+        )
+        page = catalog_cache.get(cache_key)
+        if page is not None:
+            return page
 
         filters = []
 
@@ -38,30 +117,82 @@ class CarService:
         if transmission is not None:
             filters.append(Cars.transmission == transmission)
 
+        if min_rating is not None:
+            filters.append(Cars.rating_avg >= min_rating)
+
+        if available is not None:
+            filters.append(~overlapping_bookings(Cars.uid, *available).exists())
+
+        # uid breaks the tie between cars created at the same instant
+        sort_key = [Cars.created_at, Cars.uid]
+        # the value ordered on before created_at, if any, goes in the cursor too
+        lead = None
+        car_search = None
         if search is not None:
-            filters.append(func.lower(Cars.car_name).contains(search.lower()))
+            car_search = get_car_search(session.get_bind().dialect.name)
+        if sort == "rating":
+            lead = _RATING_ORDER
+        elif car_search is not None:
+            lead = car_search.rank(search)
 
-        statement = (
-            select(Cars)
-            .where(*filters)
-            .where(Cars.is_booked == False)
-            .limit(limit)
-            .offset(offset)
-            .order_by(desc(Cars.created_at))
+        columns = list(_SUMMARY_COLUMNS)
+        if lead is not None:
+            sort_key.insert(0, lead)
+            columns.append(lead.label("sort_lead"))
+        statement = select(*columns)
+
+        if car_search is not None:
+            statement = car_search.match(statement, search)
+
+        statement = statement.where(*filters)
+
+        if cursor is not None:
+            created_at, uid, cursor_lead, _ = cursor
+            cursor_key = [created_at, uid]
+            if lead is not None:
+                cursor_key.insert(0, cursor_lead)
+            statement = statement.where(tuple_(*sort_key) < tuple_(*cursor_key))
+        else:
+            statement = statement.offset(offset)
+
+        # one extra row tells us whether there is a next page
+        statement = statement.order_by(*(desc(key) for key in sort_key)).limit(
+            limit + 1
         )
 
         result = await session.exec(statement)
-        cars = result.all()
-        return cars
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_row = rows[-1]
+            next_cursor = utils.encode_cursor(
+                last_row.created_at,
+                last_row.uid,
+                last_row.sort_lead if lead is not None else None,
+                sort,
+            )
+
+        cars = [schemas.CarSummaryModel.model_validate(row._mapping) for row in rows]
+        catalog_cache.set(cache_key, (cars, next_cursor))
+        return cars, next_cursor
 
     async def get_car(
-        self, car_uid: uuid.UUID, session: AsyncSession
+        self, car_uid: uuid.UUID, session: AsyncSession, *options
     ) -> Optional[Cars]:
-        statement = select(Cars).where(Cars.uid == car_uid)
+        # options are the loaders of the relationships the caller needs, if any
+        statement = select(Cars).where(Cars.uid == car_uid).options(*options)
         result = await session.exec(statement)
         car = result.first()  # this will either return None or Car Object
         return car
 
+    # the car page, with its reviews
+    async def get_car_detail(
+        self, car_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[Cars]:
+        return await self.get_car(car_uid, session, selectinload(Cars.reviews))
+
     async def create_car(
         self,
         car_data: schemas.CarCreateModel,
@@ -74,7 +205,9 @@ class CarService:
         new_car = Cars(**car_data_dict)
         session.add(new_car)
         await session.commit()
+        catalog_cache.clear()
         await session.refresh(new_car)
+        await session.refresh(new_car, ["reviews"])
         return new_car
 
     async def edit_car(
@@ -93,7 +226,9 @@ class CarService:
             setattr(car, key, value)
 
         await session.commit()
+        catalog_cache.clear()
         await session.refresh(car)
+        await session.refresh(car, ["reviews"])
 
         return car
 
@@ -105,5 +240,54 @@ class CarService:
             return None
         await session.delete(car)
         await session.commit()
+        catalog_cache.clear()
 
         return {"message": "car deleted successfully"}
+
+    async def update_rating(
+        self,
+        car_uid: uuid.UUID,
+        count_delta: int,
+        sum_delta: int,
+        session: AsyncSession,
+    ) -> None:
+        """
+        Moves the rating aggregates of a car by the given amounts.
+        This runs as one UPDATE in the caller's transaction so it commits (or
+        rolls back) together with the review change, the caller commits.
+        """
+        rating_count = Cars.rating_count + count_delta
+        rating_sum = Cars.rating_sum + sum_delta
+        statement = (
+            update(Cars)
+            .where(Cars.uid == car_uid)
+            .values(
+                rating_count=rating_count,
+                rating_sum=rating_sum,
+                rating_avg=case(
+                    (rating_count > 0, cast(rating_sum, Float) / rating_count),
+                    else_=None,
+                ),
+            )
+        )
+        await session.exec(statement)
+
+    async def reconcile_ratings(self, session: AsyncSession) -> int:
+        """
+        Recomputes the rating aggregates of every car from its reviews.
+        Used to backfill existing data and to repair any drift.
+        Returns the number of cars updated, the caller commits.
+        """
+        statement = update(Cars).values(
+            rating_count=select(func.count(Reviews.uid))
+            .where(Reviews.car_id == Cars.uid)
+            .scalar_subquery(),
+            rating_sum=select(func.coalesce(func.sum(Reviews.rating), 0))
+            .where(Reviews.car_id == Cars.uid)
+            .scalar_subquery(),
+            rating_avg=select(func.avg(Reviews.rating))
+            .where(Reviews.car_id == Cars.uid)
+            .scalar_subquery(),
+        )
+        result = await session.exec(statement)
+        return result.rowcount
@@ -0,0 +1,39 @@
+"""
+Rolls the wallet snapshots forward by folding the ledger entries into Wallet.credit.
+
+Run it from a scheduler, or let it loop on its own:
+
+    python -m src.wallet.compact
+    python -m src.wallet.compact --every 300
+"""
+
+import argparse
+import asyncio
+
+from src.db.main import AsyncSessionLocal, async_engine
+from src.wallet.service import WalletService
+
+
+async def compact():
+    async with AsyncSessionLocal() as session:
+        compacted = await WalletService().compact_ledger(session)
+    print(f"Rolled {compacted} wallet snapshots forward")
+
+
+async def main(every: float):
+    try:
+        while True:
+            await compact()
+            if not every:
+                break
+            await asyncio.sleep(every)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--every", type=float, default=0, help="seconds between runs, 0 runs once"
+    )
+    asyncio.run(main(parser.parse_args().every))
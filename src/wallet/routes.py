@@ -5,13 +5,14 @@ from src.auth.Dependencies import (
     user_dependency,
     vendor_dependency,
 )
-from src.db.main import get_async_session
+from src.db.main import get_async_read_session, get_async_session
+from src.serialization import FastJSONRoute
 from src.db.models import BaseUser
 from src.wallet.schemas import WalletAddModel
 from src.wallet.service import WalletService
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-wallet_router = APIRouter()
+wallet_router = APIRouter(route_class=FastJSONRoute)
 wallet_service = WalletService()
 
 
@@ -43,15 +44,15 @@ async def add_in_wallet(
 )
 async def get_my_wallet(
     current_user: BaseUser = Depends(get_logged_user),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
-    my_wallet = await wallet_service.get_customer_wallet(current_user.uid, session)
-    if not my_wallet:
+    balance = await wallet_service.get_customer_balance(current_user.uid, session)
+    if balance is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="wallet not found",
         )
-    return {"current_balance": my_wallet.credit}
+    return {"current_balance": balance}
 
 
 @wallet_router.get(
@@ -61,15 +62,15 @@ async def get_my_wallet(
 )
 async def get_vendor_wallet(
     current_user: BaseUser = Depends(get_logged_user),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
-    vendor_wallet = await wallet_service.get_vendor_wallet(current_user.uid, session)
-    if not vendor_wallet:
+    balance = await wallet_service.get_vendor_balance(current_user.uid, session)
+    if balance is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="wallet not found",
         )
-    return {"current_balance": vendor_wallet.credit}
+    return {"current_balance": balance}
 
 
 # we have an option to return on the response model of wallet but it
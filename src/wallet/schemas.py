@@ -1,9 +1,9 @@
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class WalletAddModel(BaseModel):
-    credit: float
+    credit: float = Field(..., gt=0)  # withdrawals are not top ups
 
 
 class WalletGetModel(BaseModel):
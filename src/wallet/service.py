@@ -1,53 +1,218 @@
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import func, insert, literal
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from src.db.models import Wallet
+from sqlmodel import select, update
+from src.db.models import LedgerEntryType, Wallet, WalletLedger
 import uuid
 
 
 class WalletService:
 
-    async def get_customer_wallet(
-        self, customer_uid: uuid.UUID, session: AsyncSession
-    ) -> Optional[Wallet]:
-        stmt = select(Wallet).where(
-            Wallet.customer_id == customer_uid,
-        )
-        result = await session.exec(stmt)
-        wallet = result.first()
+    async def add_in_wallet(
+        self, credit: float, customer_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[Dict[str, Any]]:
 
-        if wallet is None:
+        if not await self.credit_customer(customer_uid, credit, session):
             return
 
-        return wallet
+        await session.commit()
+        balance = await self.get_customer_balance(customer_uid, session)
 
-    async def add_in_wallet(
-        self, credit: float, customer_uid: uuid.UUID, session: AsyncSession
-    ) -> Optional[Dict[str, str]]:
+        return {
+            "message": f"{credit} credits added to your account successfully",
+            "current_balance": balance,
+        }
 
-        wallet = await self.get_customer_wallet(customer_uid, session)
+    # balances only change by appending to the ledger, credit + the entries
+    # after ledger_seq. an append only takes a shared lock on its wallet row
+    # (FOR KEY SHARE, the one its foreign key check takes anyway), so top ups
+    # and vendor payouts never wait for each other. debits also hold the
+    # customer's wallet lock to check the funds, and the compaction locks a
+    # wallet exclusively, which waits until every open append to it is done
 
-        if wallet is None:
-            return
+    def _balance(self):
+        after_snapshot = (
+            select(func.coalesce(func.sum(WalletLedger.amount), 0.0))
+            .where(WalletLedger.wallet_id == Wallet.uid)
+            .where(WalletLedger.seq > Wallet.ledger_seq)
+            .scalar_subquery()
+        )
+        return (Wallet.credit + after_snapshot).label("balance")
 
-        wallet += credit
+    async def get_customer_balance(
+        self, customer_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[float]:
+        statement = select(self._balance()).where(Wallet.customer_id == customer_uid)
+        result = await session.exec(statement)
+        return result.first()
 
-        session.add(wallet)
-        await session.commit()
+    async def get_vendor_balance(
+        self, vendor_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[float]:
+        statement = select(self._balance()).where(Wallet.vendor_id == vendor_uid)
+        result = await session.exec(statement)
+        return result.first()
 
-        return {"message": f"{credit} credits added to your account successfully"}
+    async def lock_customer_wallet(
+        self, customer_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[Tuple[uuid.UUID, float]]:
+        """
+        Locks the customer's wallet until the caller commits and returns its uid
+        and balance. Debits hold this lock so two of them can not both spend
+        the same credit.
+        """
+        if session.get_bind().dialect.name == "sqlite":
+            # no row locks in sqlite, a write takes the database write lock
+            # and starts the transaction on the latest commit
+            statement = (
+                update(Wallet)
+                .where(Wallet.customer_id == customer_uid)
+                .values(ledger_seq=Wallet.ledger_seq)
+                .returning(Wallet.uid)
+            )
+            result = await session.exec(statement)
+            wallet_uid = result.scalar()
+        else:
+            statement = (
+                select(Wallet.uid)
+                .where(Wallet.customer_id == customer_uid)
+                .with_for_update()
+            )
+            result = await session.exec(statement)
+            wallet_uid = result.first()
 
-    async def get_vendor_wallet(
-        self, vendor_uid: uuid.UUID, session: AsyncSession
-    ) -> Optional[Wallet]:
+        if wallet_uid is None:
+            return
+
+        # read after the lock and in its own statement: on read committed that
+        # is a new snapshot, with everything the previous holder appended
+        statement = select(self._balance()).where(Wallet.uid == wallet_uid)
+        result = await session.exec(statement)
+        return wallet_uid, result.one()
 
-        statement = select(Wallet).where(
-            Wallet.vendor_id == vendor_uid,
+    async def _append(
+        self,
+        owner_column,
+        owner_uid: uuid.UUID,
+        entry_type: LedgerEntryType,
+        amount: float,
+        session: AsyncSession,
+        booking_uid: Optional[uuid.UUID] = None,
+    ) -> bool:
+        # INSERT ... SELECT finds the wallet by its owner in the same statement.
+        # the lock is taken by the select, before the entry gets its seq
+        statement = insert(WalletLedger).from_select(
+            ["wallet_id", "entry_type", "amount", "booking_id", "created_at"],
+            select(
+                Wallet.uid,
+                literal(entry_type, type_=WalletLedger.__table__.c.entry_type.type),
+                literal(amount),
+                literal(booking_uid, type_=WalletLedger.__table__.c.booking_id.type),
+                literal(datetime.utcnow()),
+            )
+            .where(owner_column == owner_uid)
+            .with_for_update(read=True, key_share=True),
         )
         result = await session.exec(statement)
-        wallet = result.first()
+        return result.rowcount == 1
 
-        if wallet is None:
-            return
+    async def credit_customer(
+        self,
+        customer_uid: uuid.UUID,
+        amount: float,
+        session: AsyncSession,
+        entry_type: LedgerEntryType = LedgerEntryType.TOP_UP,
+    ) -> bool:
+        """
+        Returns False if the customer has no wallet, the caller commits.
+        """
+        return await self._append(
+            Wallet.customer_id, customer_uid, entry_type, amount, session
+        )
+
+    async def debit_wallet(
+        self,
+        wallet_uid: uuid.UUID,
+        amount: float,
+        session: AsyncSession,
+        booking_uid: Optional[uuid.UUID] = None,
+    ) -> None:
+        """
+        The caller must hold lock_customer_wallet and have checked the balance.
+        """
+        await self._append(
+            Wallet.uid,
+            wallet_uid,
+            LedgerEntryType.BOOKING_DEBIT,
+            -amount,
+            session,
+            booking_uid,
+        )
+
+    async def credit_vendor(
+        self,
+        vendor_uid: uuid.UUID,
+        amount: float,
+        session: AsyncSession,
+        booking_uid: Optional[uuid.UUID] = None,
+    ) -> bool:
+        """
+        Returns False if the vendor has no wallet, the caller commits.
+        """
+        return await self._append(
+            Wallet.vendor_id,
+            vendor_uid,
+            LedgerEntryType.VENDOR_CREDIT,
+            amount,
+            session,
+            booking_uid,
+        )
+
+    async def compact_ledger(self, session: AsyncSession) -> int:
+        """
+        Rolls the snapshots forward: folds the ledger entries of every wallet
+        into Wallet.credit and moves ledger_seq past them.
+        Each wallet is done under its exclusive row lock and committed on its
+        own, appends to it wait for that one short transaction at most.
+        Returns the number of wallets rolled forward.
+        """
+        pending = (
+            WalletLedger.wallet_id == Wallet.uid,
+            WalletLedger.seq > Wallet.ledger_seq,
+        )
+        result = await session.exec(
+            select(Wallet.uid).where(select(WalletLedger.seq).where(*pending).exists())
+        )
+        wallet_uids = result.all()
+        await session.commit()
+
+        compacted = 0
+        for wallet_uid in wallet_uids:
+            # waits for the appends still open on this wallet and holds back
+            # new ones, everything the update below can see is all there is.
+            # sqlite has a single writer, the update alone is enough there
+            await session.exec(
+                select(Wallet.uid).where(Wallet.uid == wallet_uid).with_for_update()
+            )
+
+            statement = (
+                update(Wallet)
+                .where(Wallet.uid == wallet_uid)
+                .where(select(WalletLedger.seq).where(*pending).exists())
+                .values(
+                    credit=Wallet.credit
+                    + select(func.sum(WalletLedger.amount))
+                    .where(*pending)
+                    .scalar_subquery(),
+                    ledger_seq=select(func.max(WalletLedger.seq))
+                    .where(*pending)
+                    .scalar_subquery(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.exec(statement)
+            compacted += result.rowcount
+            await session.commit()
 
-        return wallet
+        return compacted
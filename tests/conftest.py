@@ -0,0 +1,55 @@
+"""
+The tests run against TEST_DB_URI, a fresh sqlite file when it is not set.
+Point it at a throwaway Postgres database to check the Postgres paths, it is
+migrated to the latest revision and the tests add their own rows to it.
+
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# before anything imports src.config, the settings are read once at import
+os.environ["DB_URI"] = os.environ.get(
+    "TEST_DB_URI", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+)
+for key, value in {
+    "ADMIN_NAME": "test",
+    "ADMIN_PANEL_PASSWORD": "test",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_DAYS": "1",
+}.items():
+    os.environ.setdefault(key, value)
+
+from src.db.main import async_engine  # noqa: E402
+from src.db.migrations import upgrade  # noqa: E402
+
+
+def run_async(coro):
+    """
+    Runs a coroutine on a new event loop. The pool is emptied afterwards,
+    its connections belong to the loop that opened them.
+    """
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    run_async(upgrade())
+
+
+@pytest.fixture(scope="session")
+def run():
+    return run_async
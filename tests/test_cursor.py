@@ -0,0 +1,50 @@
+"""
+Cursors come back from clients, a forged one must be a 400 and never a 500.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src import utils
+
+
+def forge(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created_at, uid = datetime(2024, 1, 5, 12), uuid.uuid4()
+    assert utils.decode_cursor(utils.encode_cursor(created_at, uid)) == (
+        created_at,
+        uid,
+        None,
+        "newest",
+    )
+    assert utils.decode_cursor(
+        utils.encode_cursor(created_at, uid, 4.5, "rating")
+    ) == (created_at, uid, 4.5, "rating")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64!",
+        forge({"a": 1}),
+        forge([1.0, 5]),
+        forge([1.0, {}]),
+        forge(["2024-01-05T12:00:00", None]),
+        forge(["2024-01-05T12:00:00", uuid.uuid4().hex, "1.0"]),
+        forge(["2024-01-05T12:00:00", uuid.uuid4().hex, True]),
+        forge(["2024-01-05T12:00:00", uuid.uuid4().hex, 1.0, ["rating"]]),
+        forge(["2024-01-05T12:00:00", uuid.uuid4().hex, 1.0, "cheapest"]),
+        forge(["yesterday", uuid.uuid4().hex]),
+    ],
+)
+def test_forged_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        utils.decode_cursor(cursor)
@@ -0,0 +1,57 @@
+"""
+Concurrent guesses at one account all start before any of them has failed,
+the throttle must count them as they come in and not once bcrypt answered.
+"""
+
+import asyncio
+
+from src.auth.throttle import LoginThrottle, MemoryThrottleBackend
+
+
+def make_throttle() -> LoginThrottle:
+    return LoginThrottle(
+        MemoryThrottleBackend(100),
+        window=900,
+        account_attempts=5,
+        ip_attempts=20,
+        base_delay=1,
+        max_delay=900,
+    )
+
+
+def test_concurrent_attempts_only_get_the_free_ones():
+    throttle = make_throttle()
+
+    async def guesses():
+        return await asyncio.gather(
+            *(throttle.attempt("Customer", "a@b.com", "10.0.0.1") for _ in range(50))
+        )
+
+    waits = asyncio.run(guesses())
+    assert sum(1 for wait in waits if wait == 0) == 5
+
+
+def test_good_password_gives_the_attempt_back():
+    throttle = make_throttle()
+
+    async def logins():
+        for _ in range(10):
+            assert await throttle.attempt("Vendor", "v@b.com", "10.0.0.2") == 0
+            await throttle.succeeded("Vendor", "v@b.com", "10.0.0.2")
+
+    asyncio.run(logins())
+
+
+def test_throttled_attempts_do_not_extend_the_wait():
+    throttle = make_throttle()
+
+    async def lock_then_hammer():
+        for _ in range(6):
+            await throttle.attempt("Customer", "c@b.com", "10.0.0.3")
+        first = await throttle.attempt("Customer", "c@b.com", "10.0.0.3")
+        for _ in range(20):
+            await throttle.attempt("Customer", "c@b.com", "10.0.0.3")
+        return first, await throttle.attempt("Customer", "c@b.com", "10.0.0.3")
+
+    first, last = asyncio.run(lock_then_hammer())
+    assert 0 < last <= first
@@ -0,0 +1,144 @@
+"""
+Many bookings of one customer at once, with top ups and the ledger compaction
+running next to them, must never spend the same credit twice and must leave
+both wallets exact (user-009, on the user-010 ledger).
+Everything goes through BookingService.create_booking and
+WalletService.add_in_wallet, the paths the routes use.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from src.booking_table.schemas import CreateBookingModel
+from src.booking_table.service import BookingService
+from src.db.main import AsyncSessionLocal
+from src.db.models import Booking, Cars, Customers, Vendors, Wallet
+from src.wallet.service import WalletService
+
+PRICE_PER_DAY = 30
+
+booking_service = BookingService()
+wallet_service = WalletService()
+
+
+async def make_customer_and_cars(credit: float, cars: int):
+    async with AsyncSessionLocal() as session:
+        customer = Customers(
+            email=f"debit-{uuid.uuid4().hex[:8]}@test-carento.com",
+            password="x",
+            phone_no="0300",
+            first_name="Debit",
+            last_name="Test",
+        )
+        vendor = Vendors(
+            email=f"payout-{uuid.uuid4().hex[:8]}@test-carento.com",
+            password="x",
+            phone_no="0300",
+            is_business=False,
+        )
+        session.add_all([customer, vendor])
+        await session.flush()
+        session.add_all(
+            [
+                Wallet(customer_id=customer.uid, credit=credit),
+                Wallet(vendor_id=vendor.uid, credit=0),
+            ]
+        )
+        car_uids = []
+        for i in range(cars):
+            car = Cars(
+                car_name=f"Debit car {i}",
+                image_url="x",
+                model_year="2020",
+                brand="Suzuki",
+                car_category="Hatchback",
+                engine_size="1.0",
+                fuel_type="Petrol",
+                siting_capacity=4,
+                price_per_day=PRICE_PER_DAY,
+                registration_no=f"DEBIT-{uuid.uuid4().hex[:8]}",
+                transmission="Manual",
+                vendor_id=vendor.uid,
+            )
+            session.add(car)
+            car_uids.append(car.uid)
+        await session.commit()
+        return customer, vendor.uid, car_uids
+
+
+async def book(customer: Customers, car_uid: uuid.UUID, day: int) -> bool:
+    # every booking its own car and its own day, only the money can refuse it
+    start_date = datetime(2030, 1, 1) + timedelta(days=day)
+    booking = CreateBookingModel(
+        start_date=start_date, end_date=start_date + timedelta(days=1), no_of_days=1
+    )
+    async with AsyncSessionLocal() as session:
+        new_booking = await booking_service.create_booking(
+            car_uid, booking, session, customer
+        )
+        return new_booking is not None
+
+
+async def top_up(customer_uid: uuid.UUID, credit: float) -> None:
+    async with AsyncSessionLocal() as session:
+        assert await wallet_service.add_in_wallet(credit, customer_uid, session)
+
+
+async def compact(rounds: int) -> None:
+    async with AsyncSessionLocal() as session:
+        for _ in range(rounds):
+            await wallet_service.compact_ledger(session)
+            await asyncio.sleep(0.005)
+
+
+async def final_state(customer_uid: uuid.UUID, vendor_uid: uuid.UUID):
+    async with AsyncSessionLocal() as session:
+        result = await session.exec(
+            select(func.count(Booking.uid)).where(Booking.customer_id == customer_uid)
+        )
+        return (
+            result.one(),
+            await wallet_service.get_customer_balance(customer_uid, session),
+            await wallet_service.get_vendor_balance(vendor_uid, session),
+        )
+
+
+def test_parallel_bookings_never_overdraw(run):
+    async def scenario():
+        customer, vendor_uid, cars = await make_customer_and_cars(100, cars=10)
+        booked = await asyncio.gather(
+            *(book(customer, car_uid, day) for day, car_uid in enumerate(cars))
+        )
+        return booked, await final_state(customer.uid, vendor_uid)
+
+    booked, (bookings, customer_balance, vendor_balance) = run(scenario())
+    assert booked.count(True) == bookings == 3
+    assert customer_balance == 100 - 3 * PRICE_PER_DAY
+    assert vendor_balance == 3 * PRICE_PER_DAY
+
+
+def test_bookings_top_ups_and_compaction_keep_balances_exact(run):
+    async def scenario():
+        customer, vendor_uid, cars = await make_customer_and_cars(100, cars=12)
+        results = await asyncio.gather(
+            compact(rounds=5),
+            *(top_up(customer.uid, 20) for _ in range(5)),
+            *(book(customer, car_uid, day) for day, car_uid in enumerate(cars)),
+        )
+        before = await final_state(customer.uid, vendor_uid)
+        async with AsyncSessionLocal() as session:
+            await wallet_service.compact_ledger(session)
+        return results[6:], before, await final_state(customer.uid, vendor_uid)
+
+    booked, before, after = run(scenario())
+    bookings, customer_balance, vendor_balance = after
+    assert before == after
+    assert booked.count(True) == bookings
+    # at least what the first 100 pays for, at most what all the top ups add
+    assert 3 <= bookings <= 6
+    assert customer_balance == 100 + 5 * 20 - bookings * PRICE_PER_DAY >= 0
+    assert vendor_balance == bookings * PRICE_PER_DAY